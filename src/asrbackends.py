@@ -0,0 +1,654 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import io
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from asrmetrics import Histogram
+from asrtransport import KeepAlive, TokenBucket, backoff_delay, retry_after_s
+
+
+class BackendUnavailable(RuntimeError):
+    """El backend no ha respondido a tiempo o no es alcanzable."""
+
+
+class TranscriptionCancelled(RuntimeError):
+    """La petición se ha cancelado (``cancel``) antes de terminar."""
+
+
+class CancelToken:
+    """Cancelación de un turno o una petición: se usa como ``threading.Event`` y además avisa.
+
+    ``add_callback`` registra funciones que se llaman al cancelar (o en el acto
+    si ya lo está), para despertar a quien espera otra cosa: el lector de la
+    captura, los futures de transcripción... ``stamp`` guarda cuándo se canceló.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self.stamp = None
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._event.wait(timeout)
+
+    def set(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.stamp = time.monotonic()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn()
+
+    def add_callback(self, fn):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn()
+
+
+class ASRBackend:
+    """Interfaz común de los motores de transcripción.
+
+    ``audio`` es la ruta de un fichero de audio o sus bytes ya codificados.
+    Si se pasa ``stats`` (dict), el backend anota ``server_s``: el tiempo de
+    procesado del modelo, para separarlo de la subida en las métricas. Sólo los
+    que suben el audio por la red y pueden medirlo anotan además ``upload_s`` (y
+    ``upload_bytes`` si no envían ``audio`` tal cual), con lo que se estima el
+    caudal para elegir códec.
+    ``deadline`` (``time.monotonic``) es el límite del turno: los backends que
+    reintentan no lo sobrepasan y lanzan :class:`BackendUnavailable`.
+    ``cancel`` (:class:`CancelToken` o ``threading.Event``) pide abandonar la
+    petición: se comprueba entre intentos y etapas, y lanza
+    :class:`TranscriptionCancelled`. Con un ``CancelToken`` las esperas a la red
+    se despiertan en el acto; un ``Event`` simple no avisa.
+
+    Los backends que pueden decodificar varias locuciones en una sola inferencia
+    definen además ``transcribe_batch(pcms, languages)`` (PCM float32 o int16 a
+    16 kHz), que usa el modo servidor (:mod:`asrserver`).
+    """
+
+    name = "base"
+
+    def transcribe(self, audio, language: str | None = None, stats: dict | None = None,
+                   deadline: float | None = None, cancel: threading.Event | None = None) -> str:
+        raise NotImplementedError
+
+    def warmup(self):
+        pass
+
+
+def _open_audio(audio):
+    return io.BytesIO(audio) if isinstance(audio, bytes) else audio
+
+
+def _read_audio(audio, dtype: str, always_2d: bool):
+    # soundfile (libsndfile) sólo se carga al decodificar el primer audio
+    import soundfile as sf
+    return sf.read(_open_audio(audio), dtype=dtype, always_2d=always_2d)
+
+
+def audio_filename(audio: bytes) -> str:
+    """Nombre con la extensión que corresponde al contenedor (el API la usa para decodificar)."""
+    for magic, suffix in ((b"OggS", ".ogg"), (b"RIFF", ".wav"), (b"fLaC", ".flac")):
+        if audio.startswith(magic):
+            return f"segment{suffix}"
+    return "segment.flac"
+
+
+def _check_cancel(cancel, name: str):
+    if cancel is not None and cancel.is_set():
+        raise TranscriptionCancelled(name)
+
+
+def _on_cancel(cancel, fn):
+    # Sólo CancelToken avisa; un threading.Event se comprueba al despertar por otra causa
+    if cancel is not None and hasattr(cancel, "add_callback"):
+        cancel.add_callback(fn)
+
+
+class OpenAIBackend(ASRBackend):
+    """Transcripción remota con la API de OpenAI.
+
+    El cliente mantiene un pool de ``pool_size`` conexiones que ``warmup`` abre al
+    arrancar y ``KeepAlive`` mantiene calientes. Cada intento pasa por ``limiter``;
+    los 429, errores de red y 5xx se reintentan con backoff y jitter mientras
+    quede presupuesto (``deadline``) y no se superen ``max_attempts``. Cada intento
+    se anota en ``metrics`` (histograma ``backend_attempt`` y contadores por resultado).
+    """
+
+    name = "openai"
+
+    def __init__(self, client, model: str = "gpt-4o-mini-transcribe", timeout_s: float | None = None,
+                 limiter: TokenBucket | None = None, max_attempts: int = 4, backoff_s: float = 0.25,
+                 backoff_max_s: float = 2.0, keepalive_s: float = 20.0, pool_size: int = 2, metrics=None):
+        self.client = client
+        self.model = model
+        self.timeout_s = timeout_s
+        self.limiter = limiter
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+        self.pool_size = max(1, pool_size)
+        self.metrics = metrics
+        self.keepalive = KeepAlive(self._ping, keepalive_s, name=f"{self.name}-keepalive")
+
+    def _ping(self):
+        # GET barato que reutiliza (o abre) una conexión del pool
+        self.client.with_options(timeout=5.0).models.retrieve(self.model)
+
+    def warmup(self):
+        self.keepalive.start()
+        # Una petición por conexión a la vez para dejar el pool entero con TLS ya negociado
+        errors = []
+
+        def ping():
+            try:
+                self._ping()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=ping) for _ in range(self.pool_size)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+    def _record(self, outcome: str, seconds: float | None = None):
+        if self.metrics is not None:
+            if seconds is not None:
+                self.metrics.observe("backend_attempt", seconds)
+            self.metrics.inc(f"backend_attempts_{outcome}")
+
+    def _request(self, audio: bytes, language: str | None, timeout: float | None):
+        client = self.client if timeout is None else self.client.with_options(timeout=timeout)
+        return client.audio.transcriptions.with_raw_response.create(
+            model=self.model,
+            file=(audio_filename(audio), audio),
+            language=language,
+            response_format="text",  # devuelve str directamente
+        )
+
+    def transcribe(self, audio, language: str | None = None, stats: dict | None = None,
+                   deadline: float | None = None, cancel: threading.Event | None = None) -> str:
+        import openai
+
+        if not isinstance(audio, bytes):
+            # Se lee una vez para poder reenviarlo en cada reintento
+            with open(audio, "rb") as f:
+                audio = f.read()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            _check_cancel(cancel, self.name)
+            try:
+                waited = self.limiter.acquire(deadline) if self.limiter is not None else 0.0
+            except TimeoutError as e:
+                self._record("budget_exhausted")
+                raise BackendUnavailable(f"{self.name}: {e}") from e
+            if waited and self.metrics is not None:
+                self.metrics.observe("rate_limit_wait", waited)
+
+            timeout = self.timeout_s
+            if deadline is not None:
+                remaining = max(0.05, deadline - time.monotonic())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            self.keepalive.touch()
+            t0 = time.monotonic()
+            delay = None
+            try:
+                raw = self._request(audio, language, timeout)
+                request_s = time.monotonic() - t0
+                self._record("ok", request_s)
+                break
+            except openai.RateLimitError as e:
+                outcome, error = "rate_limited", e
+                delay = retry_after_s(e.response)
+                if delay is not None and self.limiter is not None:
+                    self.limiter.pause(delay)
+            except openai.APITimeoutError as e:
+                outcome, error = "timeout", e
+            except openai.APIConnectionError as e:
+                outcome, error = "network_error", e
+            except openai.InternalServerError as e:
+                outcome, error = "server_error", e
+            self._record(outcome, time.monotonic() - t0)
+
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_s, self.backoff_max_s)
+            out_of_budget = deadline is not None and time.monotonic() + delay >= deadline
+            if attempt >= self.max_attempts or out_of_budget:
+                if stats is not None:
+                    stats["attempts"] = attempt
+                raise BackendUnavailable(f"{self.name}: {outcome} after {attempt} attempt(s): {error}") from error
+            print(f"[ASR] {self.name}: {outcome}, reintento {attempt} en {delay:.2f}s", file=sys.stderr)
+            if cancel is not None:
+                cancel.wait(delay)
+            else:
+                time.sleep(delay)
+
+        # La respuesta de una petición ya cancelada se descarta
+        _check_cancel(cancel, self.name)
+        if stats is not None:
+            stats["attempts"] = attempt
+            if raw.headers.get("openai-processing-ms"):
+                stats["server_s"] = float(raw.headers["openai-processing-ms"]) / 1000
+                # Sin tiempo de servidor no se puede separar la subida del modelo
+                stats["upload_s"] = max(0.0, request_s - stats["server_s"])
+        resp = raw.parse()
+        return resp if isinstance(resp, str) else getattr(resp, "text", "")
+
+
+class LocalWhisperBackend(ASRBackend):
+    """Whisper cuantizado en CPU con faster-whisper (CTranslate2).
+
+    El modelo se carga una vez y se mantiene en memoria; ``warmup`` lo carga y
+    hace una decodificación de prueba para no pagar ese coste en el primer turno.
+    """
+
+    name = "local"
+    SAMPLERATE = 16_000
+
+    def __init__(self, model: str = "small", compute_type: str = "int8", cpu_threads: int = 0,
+                 beam_size: int = 1):
+        self.model_name = model
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                from faster_whisper import WhisperModel
+                self._model = WhisperModel(self.model_name, device="cpu",
+                                           compute_type=self.compute_type,
+                                           cpu_threads=self.cpu_threads)
+                print(f"[ASR] Local model '{self.model_name}' ({self.compute_type}) loaded")
+            return self._model
+
+    def warmup(self):
+        self._decode(np.zeros(self.SAMPLERATE, dtype=np.float32), None)
+
+    def transcribe(self, audio, language: str | None = None, stats: dict | None = None,
+                   deadline: float | None = None, cancel: threading.Event | None = None) -> str:
+        t0 = time.monotonic()
+        pcm, samplerate = _read_audio(audio, 'float32', always_2d=False)
+        if samplerate != self.SAMPLERATE:
+            raise ValueError(f"El motor local espera {self.SAMPLERATE} Hz, recibido {samplerate} Hz")
+        if pcm.ndim > 1:
+            pcm = pcm.mean(axis=1)
+        text = self._decode(pcm, language, cancel)
+        if stats is not None:
+            stats["server_s"] = time.monotonic() - t0
+        return text
+
+    def transcribe_batch(self, pcms, languages) -> list:
+        """Decodifica varias locuciones de hasta 30 s en una sola llamada a ``generate`` de CTranslate2.
+
+        Las más largas (o si falla la API interna de faster-whisper) se decodifican una a una.
+        """
+        pcms = [p.astype(np.float32) / 32768 if p.dtype == np.int16 else p for p in pcms]
+        texts = [None] * len(pcms)
+        short = [i for i, p in enumerate(pcms) if len(p) <= 30 * self.SAMPLERATE]
+        if len(short) > 1:
+            try:
+                for i, text in zip(short, self._generate([pcms[i] for i in short], [languages[i] for i in short])):
+                    texts[i] = text
+            except (AttributeError, ImportError, TypeError) as e:
+                print(f"[ASR] Lote local no disponible, se decodifica uno a uno: {e}", file=sys.stderr)
+        return [self._decode(pcm, lang) if text is None else text
+                for pcm, lang, text in zip(pcms, languages, texts)]
+
+    def _generate(self, pcms, languages) -> list:
+        import ctranslate2
+        from faster_whisper.audio import pad_or_trim
+        from faster_whisper.tokenizer import Tokenizer
+
+        model = self._get_model()
+        frames = model.feature_extractor.nb_max_frames
+        features = np.stack([pad_or_trim(model.feature_extractor(pcm), frames) for pcm in pcms])
+        features = ctranslate2.StorageView.from_array(np.ascontiguousarray(features, dtype=np.float32))
+        if any(lang is None for lang in languages):
+            detected = model.model.detect_language(features)
+            languages = [lang or d[0][0][2:-2] for lang, d in zip(languages, detected)]
+        tokenizers = [Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=lang)
+                      for lang in languages]
+        prompts = [list(t.sot_sequence) + [t.no_timestamps] for t in tokenizers]
+        results = model.model.generate(features, prompts, beam_size=self.beam_size)
+        return [t.decode(r.sequences_ids[0]).strip() for t, r in zip(tokenizers, results)]
+
+    def _decode(self, pcm, language, cancel=None):
+        segments, _info = self._get_model().transcribe(pcm, language=language,
+                                                       beam_size=self.beam_size,
+                                                       condition_on_previous_text=False)
+        # Los segmentos se decodifican al iterar: entre uno y otro se puede abandonar
+        texts = []
+        for seg in segments:
+            _check_cancel(cancel, self.name)
+            texts.append(seg.text)
+        return "".join(texts).strip()
+
+
+class FallbackBackend(ASRBackend):
+    """Usa ``primary`` y, si no está disponible o expira, decodifica con ``fallback``."""
+
+    def __init__(self, primary: ASRBackend, fallback: ASRBackend):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def warmup(self):
+        self.primary.warmup()
+        self.fallback.warmup()
+
+    def transcribe(self, audio, language: str | None = None, stats: dict | None = None,
+                   deadline: float | None = None, cancel: threading.Event | None = None) -> str:
+        try:
+            return self.primary.transcribe(audio, language, stats, deadline, cancel)
+        except BackendUnavailable as e:
+            print(f"[ASR] {e}; usando {self.fallback.name}", file=sys.stderr)
+            if stats is not None:
+                stats["fallback"] = True
+            return self.fallback.transcribe(audio, language, stats, cancel=cancel)
+
+
+class HedgedBackend(ASRBackend):
+    """Envía a ``primary`` y, si tarda más de lo habitual, repite la petición en ``hedge``.
+
+    El retardo es el percentil ``percentile`` de las últimas latencias de ``primary``
+    (``delay_s`` hasta tener ``min_samples``), acotado a ``[min_delay_s, max_delay_s]``.
+    Si ``primary`` falla antes, el hedge sale en el acto. Gana la primera respuesta
+    válida y a la otra se le activa su ``cancel``.
+    """
+
+    def __init__(self, primary: ASRBackend, hedge: ASRBackend, delay_s: float = 1.5, percentile: float = 90,
+                 min_delay_s: float = 0.3, max_delay_s: float = 3.0, min_samples: int = 20, metrics=None):
+        self.primary = primary
+        self.hedge = hedge
+        self.name = f"{primary.name}|{hedge.name}"
+        self.delay_s = delay_s
+        self.percentile = percentile
+        self.min_delay_s = min_delay_s
+        self.max_delay_s = max_delay_s
+        self.min_samples = min_samples
+        self.metrics = metrics
+        self._latency = Histogram(window=256)
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hedge")
+
+    def warmup(self):
+        self.primary.warmup()
+        self.hedge.warmup()
+
+    def hedge_delay(self) -> float:
+        if self._latency.count < self.min_samples:
+            delay = self.delay_s
+        else:
+            delay = self._latency.percentiles((self.percentile,))[0]
+        return min(max(delay, self.min_delay_s), self.max_delay_s)
+
+    def _run(self, backend: ASRBackend, audio, language, deadline, cancel, record: bool):
+        stats = {}
+        t0 = time.monotonic()
+        try:
+            text = backend.transcribe(audio, language, stats, deadline, cancel)
+        except TranscriptionCancelled:
+            # Si el primario pierde, lo que llevaba es una cota inferior de su latencia
+            if record:
+                self._latency.observe(time.monotonic() - t0)
+            raise
+        if record:
+            self._latency.observe(time.monotonic() - t0)
+        return text, stats
+
+    def transcribe(self, audio, language: str | None = None, stats: dict | None = None,
+                   deadline: float | None = None, cancel: threading.Event | None = None) -> str:
+        cancels = {self.primary: CancelToken(), self.hedge: CancelToken()}
+        pending = {self._executor.submit(self._run, self.primary, audio, language, deadline,
+                                         cancels[self.primary], True): self.primary}
+        delay = self.hedge_delay()
+        hedge_at = time.monotonic() + delay
+        hedged = False
+        error = None
+        # Se espera a la vez a las peticiones, a la cancelación del turno, al instante del
+        # hedge y al límite del turno, sin despertar por nada más
+        cancelled = Future()
+        _on_cancel(cancel, lambda: cancelled.set_result(None))
+        try:
+            while pending:
+                _check_cancel(cancel, self.name)
+                wake_at = deadline if hedged else hedge_at if deadline is None else min(hedge_at, deadline)
+                timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+                done, _ = wait([*pending, cancelled], timeout=timeout, return_when=FIRST_COMPLETED)
+                _check_cancel(cancel, self.name)
+                if not done and deadline is not None and time.monotonic() >= deadline:
+                    raise BackendUnavailable(f"{self.name}: sin respuesta dentro del presupuesto del turno")
+                for future in done:
+                    backend = pending.pop(future)
+                    try:
+                        text, branch_stats = future.result()
+                    except Exception as e:
+                        print(f"[ASR] {backend.name} falló: {e}", file=sys.stderr)
+                        error = error or e
+                        continue
+                    if stats is not None:
+                        stats.update(branch_stats)
+                        stats["hedged"] = hedged
+                        stats["winner"] = backend.name
+                    if hedged and self.metrics is not None:
+                        self.metrics.inc("hedge_won" if backend is self.hedge else "hedge_lost")
+                    return text
+                if not hedged and (not pending or time.monotonic() >= hedge_at):
+                    # El primario tarda (o ha fallado): la misma petición al segundo motor
+                    hedged = True
+                    if self.metrics is not None:
+                        self.metrics.inc("hedge_sent")
+                        self.metrics.observe("hedge_delay", delay)
+                    pending[self._executor.submit(self._run, self.hedge, audio, language, deadline,
+                                                  cancels[self.hedge], False)] = self.hedge
+            raise error
+        finally:
+            # La que pierde se cancela: deja de reintentar y su respuesta se descarta
+            for event in cancels.values():
+                event.set()
+
+
+class ServerBackend(ASRBackend):
+    """Robot ligero: envía el PCM de cada locución a un ebo_asr en modo servidor.
+
+    ``proxy`` es un ``RoboCompEboASR.EboASRPrx`` (``EboASRProxy`` en la
+    configuración). La llamada se hace con ``transcribeAudioAsync`` y el tiempo
+    de invocación limitado al ``deadline``; los fallos de Ice se convierten en
+    :class:`BackendUnavailable` para que ``HedgedBackend`` pueda cubrirlos.
+    Como la interfaz recibe PCM, el robot codifica en ``wav`` (``ASR.Codec`` se
+    fija al elegir este backend) y aquí sólo se quita la cabecera.
+    """
+
+    name = "server"
+
+    def __init__(self, proxy, timeout_s: float = 8.0):
+        if proxy is None:
+            raise ValueError("ASR.Backend=server necesita EboASRProxy en la configuración")
+        self.proxy = proxy
+        self.timeout_s = timeout_s
+
+    def warmup(self):
+        # Abre la conexión antes del primer turno
+        self.proxy.ice_ping()
+
+    def transcribe(self, audio, language: str | None = None, stats: dict | None = None,
+                   deadline: float | None = None, cancel: threading.Event | None = None) -> str:
+        import Ice
+
+        pcm, samplerate = _read_audio(audio, 'int16', always_2d=True)
+        pcm = pcm[:, 0] if pcm.shape[1] == 1 else pcm.mean(axis=1).astype(np.int16)
+        timeout = self.timeout_s if deadline is None else min(self.timeout_s, deadline - time.monotonic())
+        if timeout <= 0:
+            raise BackendUnavailable(f"{self.name}: sin tiempo para la petición")
+        done = threading.Event()
+        sent = []
+        payload = pcm.tobytes()
+        try:
+            t0 = time.monotonic()
+            future = self.proxy.ice_invocationTimeout(int(timeout * 1000)).transcribeAudioAsync(
+                payload, samplerate, language or "")
+            # Ice avisa cuando la petición entera ha salido por el socket: eso es la subida
+            future.add_sent_callback(lambda _f, _sync: sent.append(time.monotonic()))
+            future.add_done_callback(lambda _f: done.set())
+            _on_cancel(cancel, done.set)
+            # Sin timeout: el de invocación de Ice garantiza que el future termina
+            done.wait()
+            if cancel is not None and cancel.is_set():
+                future.cancel()
+                _check_cancel(cancel, self.name)
+            text = future.result()
+            if stats is not None and sent:
+                stats["upload_s"] = sent[0] - t0
+                stats["upload_bytes"] = len(payload)
+            return text
+        except Ice.LocalException as e:
+            raise BackendUnavailable(f"{self.name}: {type(e).__name__}") from e
+        except Ice.UserException as e:
+            # TranscriptionError del servidor (sin backend, petición caducada...)
+            raise BackendUnavailable(f"{self.name}: {getattr(e, 'what', type(e).__name__)}") from e
+
+
+class StubBackend(ASRBackend):
+    """Backend falso para benchmarks y pruebas sin red.
+
+    No decodifica nada: espera ``latency_s`` (con ruido gaussiano de ``jitter_s``)
+    y devuelve ``text``. La espera se anota como tiempo de servidor. Un lote de
+    n locuciones tarda ``latency_s * (1 + batch_cost * (n - 1))``, como un modelo
+    que aprovecha el lote.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_s: float = 0.3, jitter_s: float = 0.0, text: str = "", batch_cost: float = 0.1):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.text = text
+        self.batch_cost = batch_cost
+
+    def transcribe_batch(self, pcms, languages) -> list:
+        time.sleep(self.latency_s * (1 + self.batch_cost * (len(pcms) - 1)))
+        return [self.text] * len(pcms)
+
+    def transcribe(self, audio, language: str | None = None, stats: dict | None = None,
+                   deadline: float | None = None, cancel: threading.Event | None = None) -> str:
+        delay = max(0.0, random.gauss(self.latency_s, self.jitter_s)) if self.jitter_s else self.latency_s
+        if cancel is not None:
+            cancel.wait(delay)
+            _check_cancel(cancel, self.name)
+        else:
+            time.sleep(delay)
+        if stats is not None:
+            stats["server_s"] = delay
+        return self.text
+
+
+def create_backend(kind: str, params: dict, metrics=None, server=None) -> ASRBackend:
+    """Construye el backend indicado por ``ASR.Backend`` (openai, local, openai+local, server o stub).
+
+    Si ``ASR.HedgeBackend`` no está vacío, se envuelve en un :class:`HedgedBackend`.
+    ``metrics`` (un ``MetricsRegistry``) recibe los intentos de los backends remotos.
+    ``server`` es el proxy del ebo_asr central para ``server``.
+    """
+    # Un único limitador para todas las peticiones remotas del componente
+    limiter = TokenBucket(rate=float(params.get("ASR.RateLimitRPS", 2.0)),
+                          burst=float(params.get("ASR.RateLimitBurst", 4)))
+
+    def remote(timeout_s=None, model=None, base_url=None):
+        from dotenv import load_dotenv
+        from openai import DefaultHttpxClient, OpenAI
+        import httpx
+        load_dotenv()
+        pool_size = int(params.get("ASR.PoolSize", 2))
+        keepalive_s = float(params.get("ASR.KeepaliveS", 20.0))
+        # Los reintentos los hace OpenAIBackend (dentro del presupuesto del turno), no el SDK
+        http_client = DefaultHttpxClient(limits=httpx.Limits(max_connections=2 * pool_size,
+                                                             max_keepalive_connections=pool_size,
+                                                             keepalive_expiry=max(30.0, 3 * keepalive_s)))
+        return OpenAIBackend(OpenAI(http_client=http_client, max_retries=0, base_url=base_url),
+                             model=model or params.get("ASR.OpenAIModel", "gpt-4o-mini-transcribe"),
+                             timeout_s=timeout_s, limiter=limiter,
+                             max_attempts=int(params.get("ASR.MaxAttempts", 4)),
+                             backoff_s=float(params.get("ASR.RetryBackoffS", 0.25)),
+                             backoff_max_s=float(params.get("ASR.RetryBackoffMaxS", 2.0)),
+                             keepalive_s=keepalive_s, pool_size=pool_size, metrics=metrics)
+
+    def local():
+        return LocalWhisperBackend(model=params.get("ASR.LocalModel", "small"),
+                                   compute_type=params.get("ASR.LocalComputeType", "int8"),
+                                   cpu_threads=int(params.get("ASR.LocalThreads", 0)),
+                                   beam_size=int(params.get("ASR.LocalBeamSize", 1)))
+
+    def build(kind):
+        kind = kind.strip().lower()
+        if kind == "openai":
+            return remote()
+        if kind == "local":
+            return local()
+        if kind == "openai+local":
+            return FallbackBackend(remote(float(params.get("ASR.RemoteTimeoutS", 8.0))), local())
+        if kind == "server":
+            return ServerBackend(server, timeout_s=float(params.get("ASR.RemoteTimeoutS", 8.0)))
+        if kind == "stub":
+            return StubBackend(latency_s=float(params.get("ASR.StubLatencyS", 0.3)),
+                               jitter_s=float(params.get("ASR.StubJitterS", 0.0)),
+                               text=params.get("ASR.StubText", ""),
+                               batch_cost=float(params.get("ASR.StubBatchCost", 0.1)))
+        raise ValueError(f"ASR.Backend desconocido: {kind}")
+
+    backend = build(kind)
+    hedge_kind = params.get("ASR.HedgeBackend", "").strip().lower()
+    if not hedge_kind:
+        return backend
+    if hedge_kind == "openai":
+        # Otro modelo y/o endpoint compatible con la API de OpenAI
+        hedge = remote(model=params.get("ASR.HedgeOpenAIModel") or None,
+                       base_url=params.get("ASR.HedgeBaseURL") or None)
+    else:
+        hedge = build(hedge_kind)
+    return HedgedBackend(backend, hedge,
+                         delay_s=float(params.get("ASR.HedgeDelayS", 1.5)),
+                         percentile=float(params.get("ASR.HedgePercentile", 90)),
+                         min_delay_s=float(params.get("ASR.HedgeMinDelayS", 0.3)),
+                         max_delay_s=float(params.get("ASR.HedgeMaxDelayS", 3.0)),
+                         metrics=metrics)
@@ -0,0 +1,275 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Benchmark offline del componente: reproduce un corpus WAV/FLAC por todo el pipeline.
+
+Cada fichero sustituye al micrófono (``ReplayInputStream``) y pasa por el mismo
+``listen_and_transcribe`` que una petición real: VAD, streaming por segmentos,
+codificación FLAC y backend (``stub`` con latencia configurable por defecto).
+
+Uso (desde la raíz del repositorio, como el componente)::
+
+    python src/asrbench.py corpus/ --speed 4 --backend-latency 0.4 --json bench.json
+
+El error de fin de voz se mide contra ``--labels`` (CSV ``file,speech_end_s``) o,
+si no se dan, contra el último bloque del fichero con RMS >= ``--ref-rms``.
+Las etapas de captura (``time_to_first_speech``, ``eos_detection``...) se miden en
+tiempo de reloj, así que con ``--speed`` > 1 salen comprimidas; el error de fin de
+voz se da siempre en segundos de audio.
+"""
+
+import argparse
+import csv
+import functools
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from PySide6 import QtCore
+
+from audiocapture import AudioCapture, ReplayInputStream
+from specificworker import SpecificWorker
+from vad import frame_features
+
+AUDIO_SUFFIXES = (".wav", ".flac")
+
+
+class BenchWorker(SpecificWorker):
+    """SpecificWorker sin LEDs reales que guarda el TurnTimer de cada turno."""
+
+    def __init__(self, capture: AudioCapture):
+        super().__init__({"LEDArrayProxy": None}, capture=capture)
+        self.last_timer = None
+        self.last_outcome = None
+
+    def finish_turn(self, timer, outcome):
+        super().finish_turn(timer, outcome)
+        self.last_timer = timer
+        self.last_outcome = outcome
+
+    def shutdown(self):
+        self.capture.stop()
+        self.leds.stop()
+        self.jobs.shutdown()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def read_config(path: str) -> dict:
+    """Lee los ``clave = valor`` de un fichero de configuración de RoboComp."""
+    params = {}
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and "=" in line:
+            key, value = line.split("=", 1)
+            params[key.strip()] = value.strip()
+    return params
+
+
+def read_labels(path: str | None) -> dict:
+    if not path:
+        return {}
+    with open(path, newline="") as f:
+        return {Path(row["file"]).name: float(row["speech_end_s"]) for row in csv.DictReader(f)}
+
+
+def find_corpus(paths) -> list:
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            files.extend(sorted(f for f in p.rglob("*") if f.suffix.lower() in AUDIO_SUFFIXES))
+        else:
+            files.append(p)
+    return files
+
+
+def load_pcm(path: Path, samplerate: int) -> np.ndarray:
+    pcm, sr = sf.read(path, dtype='int16', always_2d=True)
+    if sr != samplerate:
+        raise ValueError(f"{path}: {sr} Hz, el pipeline captura a {samplerate} Hz")
+    mono = pcm.mean(axis=1).astype(np.int16) if pcm.shape[1] > 1 else pcm[:, 0]
+    return np.ascontiguousarray(mono)
+
+
+def energy_speech_end(pcm, blocksize: int, rms_threshold: float) -> float | None:
+    """Final (en bloques) del último bloque con RMS >= ``rms_threshold``; ``None`` si no hay ninguno."""
+    n = len(pcm) // blocksize
+    if n == 0:
+        return None
+    rms, _zcr = frame_features(pcm[:n * blocksize].reshape(n, blocksize))
+    voiced = np.flatnonzero(rms >= rms_threshold)
+    return float(voiced[-1] + 1) if voiced.size else None
+
+
+def run_file(worker: BenchWorker, path: Path, args, labels: dict) -> dict:
+    capture = worker.capture
+    pcm = load_pcm(path, capture.samplerate)
+    block_s = capture.blocksize / capture.samplerate
+
+    if path.name in labels:
+        ref_blocks = labels[path.name] / block_s
+    else:
+        ref_blocks = energy_speech_end(pcm, capture.blocksize, args.ref_rms)
+
+    streams = []
+
+    def factory(**kwargs):
+        stream = ReplayInputStream(pcm, speed=args.speed, lead_silence_s=args.lead_silence,
+                                   tail_silence_s=args.tail_silence, on_finished=end_of_file, **kwargs)
+        streams.append(stream)
+        return stream
+
+    def end_of_file():
+        # Si el VAD no cerró el turno antes de acabar el fichero, el lector se despierta al parar
+        # la captura: sin voz el turno acaba como no_speech y con voz se transcribe lo capturado
+        capture.stop()
+
+    capture.stop()
+    capture.stream_factory = factory
+    worker.last_timer = None
+    text = worker.listen_and_transcribe()
+    capture.stop()
+
+    stream = streams[-1]
+    timer = worker.last_timer
+    result = {"file": str(path), "audio_s": len(pcm) / capture.samplerate,
+              "outcome": worker.last_outcome, "text": text,
+              "stages_ms": {k: v * 1000 for k, v in timer.durations.items()}}
+
+    if ref_blocks is not None and timer.has("last_voice"):
+        # Instante en que se entregó el bloque que contiene el final de referencia
+        k_ref = min(stream.lead_frames + max(0, int(np.ceil(ref_blocks)) - 1), len(stream.block_times) - 1)
+        t_ref = stream.block_time(k_ref)
+        result["eos_error_ms"] = (timer.marks["last_voice"] - t_ref) * args.speed * 1000
+        result["endpoint_delay_ms"] = (timer.marks["endpoint"] - t_ref) * args.speed * 1000
+    return result
+
+
+def summarize(results: list, worker: BenchWorker, cpu_s: float, wall_s: float) -> dict:
+    audio_s = sum(r["audio_s"] for r in results)
+    eos = np.array([r["eos_error_ms"] for r in results if "eos_error_ms" in r], dtype=float)
+    outcomes = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    summary = {
+        "files": len(results),
+        "audio_s": audio_s,
+        "outcomes": outcomes,
+        "eos_detected": int(eos.size),
+        "wall_s": wall_s,
+        "cpu_s": cpu_s,
+        "cpu_per_audio_s": cpu_s / audio_s if audio_s else 0.0,
+        # En Linux ru_maxrss está en KiB
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "capture": worker.capture.stats(),
+        "stages_ms": {stage: {"count": count, "mean": mean * 1000, "p50": p50 * 1000,
+                              "p95": p95 * 1000, "p99": p99 * 1000}
+                      for stage, count, mean, p50, p95, p99 in worker.metrics.snapshot()},
+    }
+    if eos.size:
+        abs_eos = np.abs(eos)
+        summary["eos_error_ms"] = {"mean": float(eos.mean()), "mean_abs": float(abs_eos.mean()),
+                                   "p95_abs": float(np.percentile(abs_eos, 95)),
+                                   "max_abs": float(abs_eos.max())}
+    return summary
+
+
+def print_report(results: list, summary: dict):
+    print(f"\n{'file':<40} {'outcome':<10} {'eos_err':>9} {'endpoint':>9} {'total':>9}")
+    for r in results:
+        eos = f"{r['eos_error_ms']:.0f}" if "eos_error_ms" in r else "-"
+        endpoint = f"{r['endpoint_delay_ms']:.0f}" if "endpoint_delay_ms" in r else "-"
+        total = f"{r['stages_ms'].get('total', 0):.0f}"
+        print(f"{Path(r['file']).name[:40]:<40} {r['outcome']:<10} {eos:>9} {endpoint:>9} {total:>9}")
+
+    print(f"\n{'stage (ms)':<24} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage, s in summary["stages_ms"].items():
+        print(f"{stage:<24} {s['count']:>6} {s['mean']:>8.1f} {s['p50']:>8.1f} {s['p95']:>8.1f} {s['p99']:>8.1f}")
+
+    print(f"\nfiles={summary['files']} audio={summary['audio_s']:.1f}s outcomes={summary['outcomes']}")
+    if "eos_error_ms" in summary:
+        e = summary["eos_error_ms"]
+        print(f"end-of-speech error (audio ms): mean={e['mean']:.0f} |mean|={e['mean_abs']:.0f} "
+              f"|p95|={e['p95_abs']:.0f} |max|={e['max_abs']:.0f} ({summary['eos_detected']} files)")
+    cap = summary["capture"]
+    print(f"cpu={summary['cpu_s']:.2f}s ({summary['cpu_per_audio_s'] * 1000:.1f} ms CPU per audio second) "
+          f"peak_rss={summary['peak_rss_mb']:.0f} MB dropped_frames={cap['frames_dropped']} "
+          f"overruns={cap['overruns']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a WAV/FLAC corpus through the ebo_asr pipeline")
+    parser.add_argument("corpus", nargs="+", help="audio files or directories (16 kHz)")
+    parser.add_argument("--config", default="etc/config", help="component config with the ASR.* settings")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (1 = real time)")
+    parser.add_argument("--backend", default="stub", help="ASR.Backend to use (default: stub)")
+    parser.add_argument("--backend-latency", type=float, default=0.3, help="stub latency in seconds")
+    parser.add_argument("--backend-jitter", type=float, default=0.0, help="stub latency std-dev in seconds")
+    parser.add_argument("--labels", help="CSV with file,speech_end_s reference end-of-speech times")
+    parser.add_argument("--ref-rms", type=float, default=300.0,
+                        help="RMS threshold for the reference end of speech when there are no labels")
+    parser.add_argument("--lead-silence", type=float, default=0.5, help="silence before each file (s)")
+    parser.add_argument("--tail-silence", type=float, default=2.0, help="silence after each file (s)")
+    parser.add_argument("--json", help="write per-file results and the summary to this file")
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be greater than 0")
+
+    files = find_corpus(args.corpus)
+    if not files:
+        parser.error("no .wav/.flac files found")
+
+    params = read_config(args.config) if Path(args.config).exists() else {}
+    params.update({"ASR.Backend": args.backend, "ASR.StubLatencyS": str(args.backend_latency),
+                   "ASR.StubJitterS": str(args.backend_jitter), "ASR.MetricsFile": "",
+                   "ASR.DebugAudioDir": ""})
+    labels = read_labels(args.labels)
+
+    app = QtCore.QCoreApplication(sys.argv[:1])  # noqa: F841 (QTimer del worker)
+    capture = AudioCapture(samplerate=16_000, channels=1, frame_ms=30, capacity_s=10.0,
+                           stream_factory=functools.partial(ReplayInputStream, np.zeros(0, dtype=np.int16),
+                                                            tail_silence_s=0.0))
+    worker = BenchWorker(capture)
+    worker.setParams(params)
+    worker.warmup_backend()
+
+    results = []
+    cpu0, wall0 = time.process_time(), time.monotonic()
+    try:
+        for path in files:
+            results.append(run_file(worker, path, args, labels))
+    finally:
+        worker.shutdown()
+    summary = summarize(results, worker, time.process_time() - cpu0, time.monotonic() - wall0)
+
+    print_report(results, summary)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"args": vars(args), "summary": summary, "files": results},
+                                              indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
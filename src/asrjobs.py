@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from asrbackends import CancelToken, TranscriptionCancelled
+
+
+def wait_futures(futures, cancel: CancelToken | None = None, timeout: float | None = None):
+    """Espera a que terminen ``futures``; lanza ``TranscriptionCancelled`` en cuanto se cancela."""
+    wake = threading.Event()
+    for f in futures:
+        f.add_done_callback(lambda _f: wake.set())
+    if cancel is not None:
+        cancel.add_callback(wake.set)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        wake.clear()
+        if cancel is not None and cancel.is_set():
+            raise TranscriptionCancelled("turn")
+        if all(f.done() for f in futures):
+            return
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0 or not wake.wait(remaining):
+            raise TimeoutError("transcription did not finish in time")
+
+
+class ListenJob:
+    """Una petición de escucha; ``state`` usa los nombres de RoboCompEboASR.JobState."""
+
+    PENDING = "Pending"
+    RUNNING = "Running"
+    DONE = "Done"
+    CANCELLED = "Cancelled"
+    FAILED = "Failed"
+
+    def __init__(self, job_id: int):
+        self.id = job_id
+        self.state = self.PENDING
+        self.text = ""
+        self.error = None
+        self.cancelled = False
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+
+class JobManager:
+    """Cola de trabajos de escucha.
+
+    Sólo hay un micrófono, así que los trabajos se ejecutan de uno en uno en
+    orden de llegada. Se conservan los ``keep`` últimos para ``getResult``.
+    """
+
+    def __init__(self, on_finished=None, keep: int = 64):
+        self.on_finished = on_finished
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="listen")
+        self._jobs = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def submit(self, fn) -> ListenJob:
+        with self._lock:
+            job = ListenJob(self._next_id)
+            self._next_id += 1
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.finished:
+                    break
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: int) -> ListenJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel_all(self, timeout: float | None = None) -> int:
+        """Marca como cancelados los trabajos pendientes o en curso.
+
+        Con ``timeout``, espera a que terminen; los que no lo hagan a tiempo se dan
+        por cancelados igualmente (su hilo acaba después y el resultado se descarta),
+        así quien espera el trabajo nunca queda bloqueado más de ``timeout``.
+        """
+        with self._lock:
+            active = [job for job in self._jobs.values() if not job.finished]
+        for job in active:
+            job.cancelled = True
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+            for job in active:
+                if not job.wait(max(0.0, deadline - time.monotonic())) and self._finish(job, ListenJob.CANCELLED):
+                    print(f"[ASR] Job {job.id} no terminó en {timeout * 1000:.0f} ms; se da por cancelado",
+                          file=sys.stderr)
+        return len(active)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finish(self, job: ListenJob, state: str, text: str = "", error=None) -> bool:
+        """Cierra el trabajo una sola vez (el hilo o ``cancel_all``, lo que llegue antes)."""
+        with self._lock:
+            if job.finished:
+                return False
+            job.text = text
+            job.error = error
+            job.state = state
+            job._done.set()
+        if self.on_finished is not None:
+            try:
+                self.on_finished(job)
+            except Exception as e:
+                print(f"[ASR] Error notifying job {job.id}: {e}", file=sys.stderr)
+        return True
+
+    def _run(self, job: ListenJob, fn):
+        if job.cancelled:
+            self._finish(job, ListenJob.CANCELLED)
+            return
+        with self._lock:
+            if job.finished:
+                return
+            job.state = ListenJob.RUNNING
+        try:
+            text = fn()
+        except Exception as e:
+            if not job.finished:
+                print(f"[ASR] Job {job.id} failed: {e}", file=sys.stderr)
+            self._finish(job, ListenJob.FAILED, error=e)
+            return
+        if job.cancelled:
+            self._finish(job, ListenJob.CANCELLED)
+        else:
+            self._finish(job, ListenJob.DONE, text)
@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class Histogram:
+    """Ventana de las últimas ``window`` muestras (en segundos) más totales acumulados."""
+
+    def __init__(self, window: int = 1024):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentiles(self, qs=(50, 95, 99)):
+        if not self._samples:
+            return [0.0] * len(qs)
+        return [float(v) for v in np.percentile(np.fromiter(self._samples, dtype=float), qs)]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class TurnTimer:
+    """Marcas de tiempo monótonas de cada etapa de un turno de escucha."""
+
+    def __init__(self):
+        self.marks = {"start": time.monotonic()}
+        self.durations = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name: str, at: float | None = None) -> float:
+        t = time.monotonic() if at is None else at
+        self.marks.setdefault(name, t)
+        return t
+
+    def has(self, name: str) -> bool:
+        return name in self.marks
+
+    def add(self, stage: str, seconds: float):
+        """Acumula una duración medida directamente (codificación, subida, backend...)."""
+        with self._lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        """Acumula una cantidad del turno (bytes subidos...); acaba en los contadores."""
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def span(self, stage: str, begin: str, end: str):
+        if begin in self.marks and end in self.marks:
+            with self._lock:
+                self.durations[stage] = self.marks[end] - self.marks[begin]
+
+
+class MetricsRegistry:
+    """Histogramas por etapa y contadores del componente.
+
+    Las etapas de un turno son:
+    ``time_to_first_speech``, ``vad_activation_delay``, ``eos_detection``,
+    ``encode``, ``upload``, ``backend``, ``post_speech_latency`` y ``total``.
+    Los backends remotos añaden ``backend_attempt`` (cada intento HTTP) y
+    ``rate_limit_wait``, y contadores ``backend_attempts_<resultado>``; el
+    reconocedor de órdenes, ``command_match``. Las cantidades de cada turno
+    (``TurnTimer.count``, p. ej. ``payload_bytes``) se suman a los contadores.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._hists = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            hist = self._hists.get(stage)
+            if hist is None:
+                hist = self._hists[stage] = Histogram(self.window)
+            hist.observe(seconds)
+
+    def inc(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def record_turn(self, timer: TurnTimer):
+        timer.span("time_to_first_speech", "start", "first_speech")
+        timer.span("vad_activation_delay", "first_speech", "activation")
+        timer.span("eos_detection", "last_voice", "endpoint")
+        timer.span("post_speech_latency", "endpoint", "text_ready")
+        timer.span("total", "start", "end")
+        for stage, seconds in timer.durations.items():
+            self.observe(stage, seconds)
+        for name, value in timer.counts.items():
+            self.inc(name, value)
+
+    def snapshot(self) -> list:
+        """Lista de ``(etapa, count, mean, p50, p95, p99)`` en segundos."""
+        with self._lock:
+            return [(stage, h.count, h.mean, *h.percentiles())
+                    for stage, h in sorted(self._hists.items())]
+
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def to_prometheus(self, gauges: dict | None = None) -> str:
+        lines = ["# HELP ebo_asr_stage_seconds Latency of each ASR turn stage",
+                 "# TYPE ebo_asr_stage_seconds summary"]
+        for stage, count, mean, p50, p95, p99 in self.snapshot():
+            for q, v in (("0.5", p50), ("0.95", p95), ("0.99", p99)):
+                lines.append(f'ebo_asr_stage_seconds{{stage="{stage}",quantile="{q}"}} {v:.6f}')
+            lines.append(f'ebo_asr_stage_seconds_sum{{stage="{stage}"}} {mean * count:.6f}')
+            lines.append(f'ebo_asr_stage_seconds_count{{stage="{stage}"}} {count}')
+        for name, value in sorted(self.counters().items()):
+            lines.append(f"# TYPE ebo_asr_{name}_total counter")
+            lines.append(f"ebo_asr_{name}_total {value}")
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE ebo_asr_{name} gauge")
+            lines.append(f"ebo_asr_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, gauges: dict | None = None):
+        # Escritura atómica para que el node-exporter nunca lea un fichero a medias
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus(gauges))
+        os.replace(tmp, path)
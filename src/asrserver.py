@@ -0,0 +1,295 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Modo servidor: transcripción centralizada de audio enviado por varios robots.
+
+Cada robot (``ASR.Backend = server``) envía el PCM de sus locuciones con
+``transcribeAudio``; el servidor (``ASR.ServerMode = true``) no abre micrófono y
+agrupa las peticiones concurrentes en lotes con :class:`BatchingTranscriber`.
+
+Prueba de carga con N robots simulados (desde la raíz del repositorio)::
+
+    python src/asrserver.py --robots 16 --seconds 30 --max-batch 8
+    python src/asrserver.py --robots 16 --proxy "eboasr:tcp -h asr-server -p 13455"
+
+Sin ``--proxy`` el servidor se monta en este proceso con ``--backend`` (``stub``
+por defecto); con ``--proxy`` los robots llaman por Ice a un servidor en marcha.
+"""
+
+import argparse
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+
+import numpy as np
+
+from asrbackends import BackendUnavailable, create_backend
+from asrmetrics import Histogram, MetricsRegistry
+from streaming import encode
+
+
+class _Request:
+    __slots__ = ("pcm", "language", "deadline", "future", "submitted")
+
+    def __init__(self, pcm, language, deadline):
+        self.pcm = pcm
+        self.language = language
+        self.deadline = deadline
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class BatchingTranscriber:
+    """Agrupa peticiones concurrentes en lotes y los reparte en ``workers`` hilos.
+
+    Un hilo colector toma la primera petición pendiente, espera a que haya un
+    worker libre y junta las que lleguen en ``window_s`` (o ya estén en cola)
+    hasta ``max_batch``. Mientras todos los workers están ocupados las peticiones
+    se acumulan, así que el lote crece con la carga sin añadir espera en vacío.
+
+    Si el backend tiene ``transcribe_batch`` (modelo local) cada lote es una sola
+    inferencia; si no, cada petición va sola a su worker (pool de peticiones
+    sobre el backend remoto). El audio es PCM int16 mono a ``samplerate``.
+    """
+
+    def __init__(self, backend, samplerate: int = 16_000, max_batch: int = 8, window_s: float = 0.02,
+                 workers: int = 2, metrics: MetricsRegistry | None = None):
+        self.backend = backend
+        self.samplerate = samplerate
+        self.batched = hasattr(backend, "transcribe_batch")
+        self.max_batch = max(1, max_batch) if self.batched else 1
+        self.window_s = window_s
+        self.workers = max(1, workers)
+        self.metrics = metrics
+        self.batch_sizes = Histogram()
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(self.workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asr-batch")
+        self._collector = threading.Thread(target=self._collect_loop, name="asr-batcher", daemon=True)
+        self._collector.start()
+
+    def submit(self, pcm, language: str | None = None, deadline: float | None = None) -> Future:
+        """Encola una locución; el future devuelve el texto o la excepción del backend."""
+        request = _Request(pcm, language, deadline)
+        self._queue.put(request)
+        return request.future
+
+    def transcribe(self, pcm, language: str | None = None, deadline: float | None = None) -> str:
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        future = self.submit(pcm, language, deadline)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            # Si aún está en cola, no ocupa sitio en ningún lote
+            future.cancel()
+            raise
+
+    def close(self):
+        self._queue.put(None)
+        self._collector.join(1.0)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {"batches": self.batch_sizes.count, "mean_batch": self.batch_sizes.mean,
+                "pending": self._queue.qsize(), "max_batch": self.max_batch, "workers": self.workers}
+
+    def _collect_loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            if first.future.cancelled():
+                continue
+            # Esperar a un worker libre deja que se acumulen peticiones para el lote
+            self._slots.acquire()
+            batch = [first]
+            until = time.monotonic() + self.window_s
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, until - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                if not item.future.cancelled():
+                    batch.append(item)
+            try:
+                self._pool.submit(self._run, batch)
+            except RuntimeError:
+                # Pool cerrado: nadie va a atender el lote
+                self._slots.release()
+                for r in batch:
+                    r.future.cancel()
+                return
+
+    def _run(self, batch):
+        try:
+            now = time.monotonic()
+            live = []
+            for r in batch:
+                if not r.future.set_running_or_notify_cancel():
+                    continue
+                if r.deadline is not None and now >= r.deadline:
+                    r.future.set_exception(BackendUnavailable("la petición caducó en la cola del servidor"))
+                    continue
+                live.append(r)
+                if self.metrics is not None:
+                    self.metrics.observe("server_queue", now - r.submitted)
+            if not live:
+                return
+            self.batch_sizes.observe(len(live))
+            try:
+                texts = self._transcribe(live)
+            except Exception as e:
+                for r in live:
+                    r.future.set_exception(e)
+                return
+            for r, text in zip(live, texts):
+                r.future.set_result(text)
+            if self.metrics is not None:
+                self.metrics.observe("server_batch", time.monotonic() - now)
+                self.metrics.inc("server_requests", len(live))
+                self.metrics.inc("server_batches")
+        finally:
+            self._slots.release()
+
+    def _transcribe(self, batch) -> list:
+        if self.batched:
+            return self.backend.transcribe_batch([r.pcm for r in batch], [r.language for r in batch])
+        r = batch[0]
+        return [self.backend.transcribe(encode(r.pcm, self.samplerate, "flac"), language=r.language,
+                                        deadline=r.deadline)]
+
+
+def _robot_loop(robot: int, transcribe, utterances, pause_s: float, until: float, results: list):
+    rng = np.random.default_rng(robot)
+    # Arranques escalonados: los robots no hablan todos a la vez
+    time.sleep(rng.uniform(0, pause_s))
+    while time.monotonic() < until:
+        pcm = utterances[rng.integers(len(utterances))]
+        t0 = time.monotonic()
+        try:
+            transcribe(pcm)
+            results.append((time.monotonic() - t0, None))
+        except Exception as e:
+            results.append((time.monotonic() - t0, type(e).__name__))
+        time.sleep(rng.exponential(pause_s))
+
+
+def _load_utterances(paths, samplerate: int, rng) -> list:
+    if not paths:
+        # Sin corpus: ruido de 1 a 4 s (el stub no mira el contenido)
+        return [(rng.standard_normal(int(rng.uniform(1, 4) * samplerate)) * 1000).astype(np.int16)
+                for _ in range(8)]
+    import soundfile as sf
+    from asrbench import find_corpus, load_pcm
+    from resample import resample
+
+    utterances = []
+    for path in find_corpus(paths):
+        sr = sf.info(str(path)).samplerate
+        pcm = load_pcm(path, sr)
+        utterances.append(pcm if sr == samplerate else resample(pcm, sr, samplerate))
+    return utterances
+
+
+def loadtest(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate N robots sending utterances to the ASR server")
+    parser.add_argument("corpus", nargs="*", help="audio files or directories (default: synthetic noise)")
+    parser.add_argument("--robots", type=int, default=8, help="number of simulated robots")
+    parser.add_argument("--seconds", type=float, default=30.0, help="test duration")
+    parser.add_argument("--pause", type=float, default=1.0, help="mean pause between utterances per robot (s)")
+    parser.add_argument("--language", default="es")
+    parser.add_argument("--proxy", help="Ice proxy of a running server; default: in-process server")
+    parser.add_argument("--config", default="etc/config", help="component config with the ASR.* settings")
+    parser.add_argument("--backend", default="stub", help="ASR.Backend of the in-process server")
+    parser.add_argument("--backend-latency", type=float, default=0.3, help="stub latency per batch (s)")
+    parser.add_argument("--batch-cost", type=float, default=0.1,
+                        help="stub extra latency per additional batch item, as a fraction of the latency")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    samplerate = 16_000
+    utterances = _load_utterances(args.corpus, samplerate, np.random.default_rng(0))
+    if not utterances:
+        parser.error("no .wav/.flac files found")
+    server = None
+    if args.proxy:
+        import Ice
+        Ice.loadSlice("-I ./src/ --all ./src/EboASR.ice")
+        import RoboCompEboASR
+        communicator = Ice.initialize(["--Ice.MessageSizeMax=20004800"])
+        proxy = RoboCompEboASR.EboASRPrx.uncheckedCast(communicator.stringToProxy(args.proxy))
+
+        def transcribe(pcm):
+            return proxy.transcribeAudio(pcm.tobytes(), samplerate, args.language)
+    else:
+        params = {}
+        if Path(args.config).exists():
+            from asrbench import read_config
+            params = read_config(args.config)
+        params.update({"ASR.Backend": args.backend, "ASR.StubLatencyS": str(args.backend_latency),
+                       "ASR.StubBatchCost": str(args.batch_cost), "ASR.HedgeBackend": ""})
+        metrics = MetricsRegistry()
+        backend = create_backend(args.backend, params, metrics=metrics)
+        backend.warmup()
+        server = BatchingTranscriber(backend, samplerate, max_batch=args.max_batch,
+                                     window_s=args.window_ms / 1000, workers=args.workers, metrics=metrics)
+
+        def transcribe(pcm):
+            return server.transcribe(pcm, args.language)
+
+    results = []
+    until = time.monotonic() + args.seconds
+    cpu0, wall0 = time.process_time(), time.monotonic()
+    robots = [threading.Thread(target=_robot_loop, args=(i, transcribe, utterances, args.pause, until, results),
+                               daemon=True) for i in range(args.robots)]
+    for t in robots:
+        t.start()
+    for t in robots:
+        t.join()
+    wall = time.monotonic() - wall0
+
+    latencies = np.array([lat for lat, err in results if err is None])
+    errors = len(results) - latencies.size
+    audio_s = sum(len(u) for u in utterances) / len(utterances) / samplerate * len(results)
+    print(f"robots={args.robots} requests={len(results)} errors={errors} "
+          f"throughput={len(results) / wall:.1f} req/s ({audio_s / wall:.1f} audio s/s)")
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, (50, 95, 99)) * 1000
+        print(f"latency ms: p50={p50:.0f} p95={p95:.0f} p99={p99:.0f} max={latencies.max() * 1000:.0f}")
+    if server is not None:
+        s = server.stats()
+        print(f"batches={s['batches']} mean_batch={s['mean_batch']:.2f} (max {s['max_batch']}, "
+              f"{s['workers']} workers) cpu={time.process_time() - cpu0:.2f}s")
+        server.close()
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(loadtest())
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import random
+import sys
+import threading
+import time
+
+
+class TokenBucket:
+    """Limitador de peticiones compartido por todos los backends remotos.
+
+    Repone ``rate`` fichas por segundo hasta ``burst`` (``rate <= 0`` = sin límite).
+    Tras un 429, ``pause`` bloquea el bucket hasta que pase el ``Retry-After``
+    del servidor, para que el resto de peticiones no insistan mientras tanto.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        if self.rate <= 0:
+            self._tokens = self.burst
+        else:
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, deadline: float | None = None) -> float:
+        """Toma una ficha y devuelve los segundos esperados.
+
+        Lanza ``TimeoutError`` si la ficha no estaría disponible antes de ``deadline``.
+        """
+        t0 = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return now - t0
+                    wait = (1 - self._tokens) / self.rate
+                if deadline is not None and now + wait > deadline:
+                    raise TimeoutError(f"rate limit: next slot in {wait:.2f}s exceeds the turn budget")
+                self._cond.wait(wait)
+
+    def pause(self, seconds: float):
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._cond.notify_all()
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    """Espera exponencial con jitter completo para el reintento ``attempt`` (desde 1)."""
+    return random.uniform(0.0, min(max_s, base_s * 2 ** (attempt - 1)))
+
+
+def retry_after_s(response) -> float | None:
+    """Lee ``retry-after-ms`` o ``retry-after`` (en segundos) de una respuesta HTTP."""
+    headers = getattr(response, "headers", None) or {}
+    for key, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(key)
+        if value:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                pass  # Formato fecha HTTP: usamos el backoff normal
+    return None
+
+
+class KeepAlive:
+    """Hilo que llama a ``ping`` cuando la conexión lleva ``interval_s`` sin usarse.
+
+    Así el pool HTTP conserva conexiones TLS abiertas y el primer turno tras un
+    rato de inactividad no paga DNS + TCP + TLS.
+    """
+
+    def __init__(self, ping, interval_s: float, name: str = "keepalive"):
+        self.ping = ping
+        self.interval_s = interval_s
+        self._last_used = time.monotonic()
+        self._failing = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def touch(self):
+        self._last_used = time.monotonic()
+
+    def start(self):
+        if self.interval_s > 0 and not self._thread.is_alive():
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(max(0.0, self._last_used + self.interval_s - time.monotonic())):
+            if time.monotonic() - self._last_used < self.interval_s:
+                continue
+            self.touch()
+            try:
+                self.ping()
+                self._failing = False
+            except Exception as e:
+                if not self._failing:
+                    print(f"[ASR] Keepalive fallido: {e}", file=sys.stderr)
+                self._failing = True
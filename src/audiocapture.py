@@ -0,0 +1,443 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import threading
+import time
+
+import numpy as np
+
+
+def native_rate(device=None) -> int | None:
+    """Tasa por defecto del dispositivo de entrada según PortAudio (``None`` si no se puede consultar)."""
+    try:
+        import sounddevice as sd
+        return int(sd.query_devices(device, 'input')['default_samplerate'])
+    except Exception as e:
+        print(f"[AUDIO] Cannot query native rate of input device {device!r}: {e}", file=sys.stderr)
+        return None
+
+
+class AudioCapture:
+    """Captura continua del micrófono sobre un buffer circular preasignado.
+
+    El stream de PortAudio se abre una sola vez y cada bloque de ``frame_ms``
+    se copia en una fila del buffer. ``write_index`` cuenta los bloques
+    escritos desde el arranque; la fila de un bloque es ``index % capacity``.
+
+    Con ``frontend`` (p. ej. :class:`beamform.DelayAndSumBeamformer`) el stream
+    abre ``frontend.n_channels`` canales y el front end los reduce a uno antes de
+    escribir en el buffer, que siempre es mono.
+
+    Con ``device_rate`` el stream se abre a la tasa nativa del dispositivo
+    (44.1/48 kHz) y cada bloque pasa por un :class:`resample.PolyphaseResampler`
+    hasta ``samplerate`` antes del front end, así no depende del remuestreo de
+    ALSA/PulseAudio. El buffer, el VAD y el backend siguen a ``samplerate``.
+
+    Hay un solo productor (el callback) y como mucho un consumidor activo.
+    Si el consumidor se queda atrás una vuelta entera se aplica ``drop_policy``:
+    ``drop_oldest`` sobrescribe y el lector salta al bloque más antiguo;
+    ``drop_newest`` descarta los bloques nuevos hasta que el lector avance.
+    """
+
+    DROP_POLICIES = ("drop_oldest", "drop_newest")
+
+    def __init__(self, samplerate: int = 16_000, channels: int = 1, frame_ms: int = 30,
+                 capacity_s: float = 10.0, device=None, drop_policy: str = "drop_oldest",
+                 stream_factory=None, frontend=None, device_rate: int | None = None):
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"drop_policy debe ser uno de {self.DROP_POLICIES}")
+        self.drop_policy = drop_policy
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frontend = frontend
+        self.frame_ms = frame_ms
+        self.device = device
+        # Constructor del stream (``sd.InputStream`` por defecto; ReplayInputStream en benchmarks)
+        self.stream_factory = stream_factory
+        self.blocksize = int(samplerate * frame_ms / 1000)
+        self.device_rate = None
+        self.device_blocksize = self.blocksize
+        self.resampler = None
+        self._set_device_rate(device_rate)
+        self.capacity = max(2, int(round(capacity_s * 1000 / frame_ms)))
+
+        self._ring = np.zeros((self.capacity, self.blocksize), dtype=np.int16)
+        self._stamps = np.zeros(self.capacity, dtype=np.float64)
+        self._write_index = 0
+        self._cond = threading.Condition()
+        self._stream = None
+        self._consumer = None
+
+        # Contadores (sólo los escribe el callback, salvo underruns/skipped del lector)
+        self.frames_dropped = 0
+        self.overruns = 0
+        self.underruns = 0
+        self.max_depth = 0
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None and self._stream.active
+
+    @property
+    def write_index(self) -> int:
+        return self._write_index
+
+    def start(self):
+        if self.running:
+            return
+        factory = self.stream_factory
+        if factory is None:
+            # PortAudio sólo se inicializa al abrir el primer stream
+            import sounddevice as sd
+            factory = sd.InputStream
+        # El estado del filtro no sobrevive a un reinicio del stream
+        self.resampler = self.make_resampler()
+        self._stream = factory(samplerate=self.device_rate or self.samplerate,
+                               channels=self.input_channels,
+                               dtype='int16',
+                               blocksize=self.device_blocksize,
+                               device=self.device,
+                               callback=self._callback,
+                               finished_callback=self._stream_finished)
+        self._stream.start()
+        rate = f"{self.device_rate} Hz -> {self.samplerate} Hz" if self.device_rate else f"{self.samplerate} Hz"
+        print(f"[AUDIO] Capture started: {rate}, {self.frame_ms} ms frames, "
+              f"ring={self.capacity * self.frame_ms / 1000:.1f}s")
+
+    def _set_device_rate(self, rate):
+        rate = int(rate) if rate else None
+        if rate == self.samplerate:
+            rate = None
+        if rate is not None and (rate * self.frame_ms % 1000 or rate * self.frame_ms * self.samplerate % (rate * 1000)):
+            raise ValueError(f"{self.frame_ms} ms a {rate} Hz no son un número entero de muestras a {rate} y a {self.samplerate} Hz")
+        self.device_rate = rate
+        self.device_blocksize = rate * self.frame_ms // 1000 if rate else self.blocksize
+
+    def make_resampler(self):
+        """Remuestreador para la tasa del dispositivo actual (``None`` si ya captura a ``samplerate``)."""
+        if self.device_rate is None:
+            return None
+        from resample import PolyphaseResampler
+        return PolyphaseResampler(self.device_rate, self.samplerate, self.device_blocksize,
+                                  channels=self.input_channels)
+
+    def set_device_rate(self, rate):
+        """Cambia la tasa de apertura del dispositivo (``None`` = ``samplerate``) reabriendo el stream."""
+        previous = self.device_rate
+        self._set_device_rate(rate)
+        if self.device_rate == previous:
+            return
+        was_running = self.running
+        self.stop()
+        if was_running:
+            self.start()
+
+    @property
+    def input_channels(self) -> int:
+        return self.frontend.n_channels if self.frontend is not None else self.channels
+
+    def set_frontend(self, frontend):
+        """Cambia el front end multicanal (``None`` = mono) reabriendo el stream si estaba abierto."""
+        was_running = self.running
+        self.stop()
+        self.frontend = frontend
+        if was_running:
+            self.start()
+
+    def stop(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                print(f"[AUDIO] Error closing stream: {e}", file=sys.stderr)
+        with self._cond:
+            self._cond.notify_all()
+
+    def close(self):
+        """Para el stream y libera los recursos de la captura."""
+        self.stop()
+
+    @property
+    def depth(self) -> int:
+        """Bloques escritos que el consumidor activo aún no ha leído."""
+        consumer = self._consumer
+        return 0 if consumer is None else max(0, self._write_index - consumer.index)
+
+    def stats(self) -> dict:
+        consumer = self._consumer
+        return {
+            "frames_captured": self._write_index,
+            "frames_dropped": self.frames_dropped + (consumer.skipped if consumer is not None else 0),
+            "overruns": self.overruns,
+            "underruns": self.underruns,
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "capacity": self.capacity,
+            "drop_policy": self.drop_policy,
+            "input_channels": self.input_channels,
+            "doa_deg": int(round(self.frontend.azimuth_deg)) if self.frontend is not None else -1,
+        }
+
+    def _callback(self, indata, frames, _time, status):
+        if status:
+            if status.input_overflow:
+                self.overruns += 1
+            if status.input_underflow:
+                self.underruns += 1
+            print(f"[AUDIO] {status}", file=sys.stderr)
+
+        depth = self.depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if depth >= self.capacity - 1:
+            # El consumidor va una vuelta por detrás
+            self.overruns += 1
+            if self.drop_policy == "drop_newest":
+                self.frames_dropped += 1
+                return
+
+        # Copiamos directamente en la fila preasignada (sin reservar memoria)
+        slot = self._write_index % self.capacity
+        self._stamps[slot] = time.monotonic()
+        row = self._ring[slot]
+        resampler = self.resampler
+        if resampler is not None:
+            if frames < resampler.in_block:
+                padded = np.zeros((resampler.in_block, indata.shape[1]), dtype=np.int16)
+                padded[:frames] = indata[:frames]
+                indata = padded
+            # Bloques de duración fija: siempre salen ``blocksize`` muestras
+            indata = resampler.process(indata[:resampler.in_block])
+            frames = min(self.blocksize, -(-frames * self.samplerate // self.device_rate))
+        n = min(frames, self.blocksize)
+        if self.frontend is not None:
+            self.frontend.process(indata[:n], out=row[:n])
+        else:
+            row[:n] = indata[:n, 0]
+        if n < self.blocksize:
+            row[n:] = 0
+
+        with self._cond:
+            self._write_index += 1
+            self._cond.notify_all()
+
+    def frame(self, index: int):
+        """Devuelve una vista (sin copia) del bloque ``index``.
+
+        La vista es válida hasta que el productor da la vuelta al buffer.
+        """
+        return self._ring[index % self.capacity]
+
+    def stamp(self, index: int) -> float:
+        """Instante (``time.monotonic``) en que llegó el bloque ``index``."""
+        return float(self._stamps[index % self.capacity])
+
+    def frames(self, index: int, count: int):
+        """Vista 2D (sin copia) de hasta ``count`` bloques desde ``index``.
+
+        Se corta al llegar al final del buffer, así que puede devolver menos.
+        """
+        row = index % self.capacity
+        return self._ring[row:row + min(count, self.capacity - row)]
+
+    def wait_for(self, index: int, timeout: float | None = None, cancel=None) -> bool:
+        """Espera a que el bloque ``index`` esté escrito (o a que se active ``cancel`` o pare el stream)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: (self._write_index > index or not self.running
+                                                or (cancel is not None and cancel.is_set())),
+                                       timeout=timeout) and self._write_index > index
+
+    def _stream_finished(self):
+        # El stream se ha quedado inactivo (fin del fichero, error del dispositivo...): nadie va a
+        # escribir más bloques, así que se despierta a los lectores
+        with self._cond:
+            self._cond.notify_all()
+
+    def interrupt(self):
+        """Despierta a los lectores que esperan audio para que revisen su ``cancel``."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def request_vad(self, aggressiveness: int):
+        """Nivel de VAD que conviene precalcular (sólo lo usa la captura en proceso aparte)."""
+
+    def speech_flags(self, index: int, count: int, aggressiveness: int):
+        """Decisiones de voz ya tomadas por el productor, o ``None`` si hay que calcularlas."""
+        return None
+
+    def count_underrun(self):
+        # El lector esperó y no llegó audio: sólo es un fallo si el stream está abierto
+        if self.running:
+            self.underruns += 1
+
+    def reader(self, pre_roll_frames: int = 0, cancel=None) -> "CaptureReader":
+        """Crea el lector activo, que empieza ``pre_roll_frames`` bloques antes del actual.
+
+        Si se pasa ``cancel`` (:class:`asrjobs.CancelToken`), al cancelarse el lector
+        deja de esperar en el acto y devuelve ``None``.
+        """
+        reader = CaptureReader(self, pre_roll_frames, cancel)
+        self._consumer = reader
+        return reader
+
+    def release(self, reader: "CaptureReader"):
+        """Desregistra el lector activo: sin consumidor no hay nada que descartar."""
+        if self._consumer is reader:
+            self.frames_dropped += reader.skipped
+            reader.skipped = 0
+            self._consumer = None
+
+
+class CaptureReader:
+    """Cursor de lectura sobre el buffer circular de :class:`AudioCapture`."""
+
+    def __init__(self, capture: AudioCapture, pre_roll_frames: int = 0, cancel=None):
+        self.capture = capture
+        self.cancel = cancel
+        if cancel is not None:
+            cancel.add_callback(capture.interrupt)
+        head = capture.write_index
+        oldest = max(0, head - capture.capacity + 1)
+        self.index = max(oldest, head - max(0, pre_roll_frames))
+        self.skipped = 0
+
+    def next(self, timeout: float | None = None):
+        """Devuelve el siguiente bloque, o ``None`` si expira ``timeout``."""
+        cap = self.capture
+        if not cap.wait_for(self.index, timeout, self.cancel):
+            if self.cancel is None or not self.cancel.is_set():
+                cap.count_underrun()
+            return None
+
+        # Si el productor nos ha adelantado, saltamos a lo más antiguo disponible
+        oldest = cap.write_index - cap.capacity + 1
+        if self.index < oldest:
+            self.skipped += oldest - self.index
+            self.index = oldest
+
+        chunk = cap.frame(self.index)
+        self.index += 1
+        return chunk
+
+    def next_batch(self, max_frames: int, timeout: float | None = None, min_frames: int = 1):
+        """Devuelve una vista con entre ``min_frames`` y ``max_frames`` bloques consecutivos.
+
+        Espera a que haya ``min_frames`` disponibles; devuelve ``None`` si expira ``timeout``.
+        """
+        cap = self.capture
+        if not cap.wait_for(self.index + max(1, min_frames) - 1, timeout, self.cancel):
+            if self.cancel is None or not self.cancel.is_set():
+                cap.count_underrun()
+            return None
+
+        oldest = cap.write_index - cap.capacity + 1
+        if self.index < oldest:
+            self.skipped += oldest - self.index
+            self.index = oldest
+
+        batch = cap.frames(self.index, min(max_frames, cap.write_index - self.index))
+        self.index += len(batch)
+        return batch
+
+
+class ReplayInputStream:
+    """Sustituto de ``sd.InputStream`` que reproduce PCM int16 ya cargado.
+
+    Se usa como ``stream_factory`` de :class:`AudioCapture` (con ``functools.partial``
+    para fijar ``pcm`` y ``speed``). Entrega bloques de ``blocksize`` muestras desde
+    un hilo propio a ``speed`` veces tiempo real, con silencio antes y después del
+    audio para que el VAD pueda cerrar el turno. ``block_times[k]`` guarda el instante
+    (``time.monotonic``) en que se entregó el bloque ``k``. Como en sounddevice,
+    ``finished_callback`` se llama cuando el stream queda inactivo.
+    """
+
+    def __init__(self, pcm, speed: float = 1.0, lead_silence_s: float = 0.5, tail_silence_s: float = 2.0,
+                 on_finished=None, *, samplerate: int, channels: int, dtype: str, blocksize: int,
+                 device=None, callback, finished_callback=None):
+        if channels != 1 or dtype != 'int16':
+            raise ValueError("ReplayInputStream sólo reproduce int16 mono")
+        if speed <= 0:
+            raise ValueError("speed debe ser mayor que 0")
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.speed = speed
+        self.callback = callback
+        self.on_finished = on_finished
+        self.finished_callback = finished_callback
+        self.lead_frames = int(round(lead_silence_s * samplerate / blocksize))
+        tail_frames = int(round(tail_silence_s * samplerate / blocksize))
+        n_frames = -(-len(pcm) // blocksize)
+
+        # El audio se rellena con ceros hasta bloques completos y se guarda como (n, blocksize, 1)
+        total = self.lead_frames + n_frames + tail_frames
+        self._data = np.zeros((total, blocksize, 1), dtype=np.int16)
+        flat = self._data.reshape(-1)
+        start = self.lead_frames * blocksize
+        flat[start:start + len(pcm)] = pcm
+        self.block_times = np.zeros(total, dtype=np.float64)
+
+        self._period = blocksize / samplerate / speed
+        self._t0 = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def block_time(self, k: int) -> float:
+        """Instante de entrega del bloque ``k`` (el previsto si aún no se ha entregado)."""
+        t = self.block_times[k]
+        return float(t) if t else self._t0 + (k + 1) * self._period
+
+    def start(self):
+        self._t0 = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="replay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        pass
+
+    def _run(self):
+        try:
+            for k, block in enumerate(self._data):
+                # Esperamos hasta el instante teórico del bloque para no acumular deriva
+                delay = self._t0 + (k + 1) * self._period - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                if self._stop.is_set():
+                    return
+                self.block_times[k] = time.monotonic()
+                self.callback(block, self.blocksize, None, None)
+            self._stop.set()
+            if self.on_finished is not None:
+                self.on_finished()
+        finally:
+            if self.finished_callback is not None:
+                self.finished_callback()
@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import argparse
+import time
+
+import numpy as np
+
+SPEED_OF_SOUND = 343.0
+
+
+def parse_positions(text: str) -> np.ndarray:
+    """Convierte ``"x,y;x,y;..."`` (metros) en un array ``(N, 2)``."""
+    positions = [[float(v) for v in mic.split(",")] for mic in text.split(";") if mic.strip()]
+    if len(positions) < 2 or any(len(p) != 2 for p in positions):
+        raise ValueError(f"Posiciones de micrófonos no válidas: {text!r}")
+    return np.array(positions, dtype=np.float64)
+
+
+def circular_array(n: int, radius: float) -> np.ndarray:
+    angles = 2 * np.pi * np.arange(n) / n
+    return radius * np.stack((np.cos(angles), np.sin(angles)), axis=1)
+
+
+class DelayAndSumBeamformer:
+    """Front end de array de micrófonos: N canales a un solo canal mejorado.
+
+    Trabaja bloque a bloque en frecuencia (FFT con relleno a ``n_fft`` >= 2 bloques
+    y solapamiento-suma). Estima la dirección de llegada con SRP-PHAT sobre
+    ``n_directions`` acimuts, suavizada entre bloques y actualizada sólo en bloques
+    con RMS >= ``min_rms``, y suma los canales alineados hacia esa dirección.
+    Con ``fixed_azimuth_deg`` no se estima la dirección.
+    """
+
+    def __init__(self, mic_positions, samplerate: int, blocksize: int, n_directions: int = 36,
+                 smoothing: float = 0.8, min_rms: float = 100.0, fixed_azimuth_deg: float | None = None):
+        positions = np.asarray(mic_positions, dtype=np.float64)
+        self.n_channels = len(positions)
+        self.blocksize = blocksize
+        self.smoothing = smoothing
+        self.min_rms = min_rms
+        self.n_fft = 1 << (2 * blocksize - 1).bit_length()
+
+        self.azimuths = 2 * np.pi * np.arange(n_directions) / n_directions
+        directions = np.stack((np.cos(self.azimuths), np.sin(self.azimuths)), axis=1)
+        # Retardo de cada micro (onda plana desde cada acimut): los más cercanos reciben antes
+        tau = -(directions @ (positions - positions.mean(axis=0)).T) / SPEED_OF_SOUND   # (K, N)
+        # Alineamos retrasando cada canal hasta el último en recibir: filtro causal
+        comp = tau.max(axis=1, keepdims=True) - tau
+        freqs = np.fft.rfftfreq(self.n_fft, 1 / samplerate)
+        self._align = np.exp(-2j * np.pi * freqs[None, None, :] * comp[:, :, None]).astype(np.complex64)
+
+        self._srp = np.zeros(n_directions, dtype=np.float32)
+        self._tail = np.zeros(self.n_fft - blocksize, dtype=np.float32)
+        if fixed_azimuth_deg is None:
+            self.fixed = False
+            self.direction = 0
+        else:
+            self.fixed = True
+            self.direction = int(round(np.deg2rad(fixed_azimuth_deg) / (2 * np.pi) * n_directions)) % n_directions
+
+    @property
+    def azimuth_deg(self) -> float:
+        return float(np.rad2deg(self.azimuths[self.direction]))
+
+    def process(self, block, out=None) -> np.ndarray:
+        """Procesa un bloque int16 ``(frames, N)`` y escribe el canal resultante (int16) en ``out``."""
+        x = block.astype(np.float32)
+        spectrum = np.fft.rfft(x, n=self.n_fft, axis=0).T                         # (N, F)
+
+        if not self.fixed and np.sqrt(np.mean(x * x)) >= self.min_rms:
+            # SRP-PHAT: potencia de la suma alineada de los espectros normalizados, por dirección
+            phat = spectrum / (np.abs(spectrum) + 1e-9)
+            steered = np.einsum('knf,nf->kf', self._align, phat)
+            srp = np.einsum('kf,kf->k', steered.real, steered.real) + np.einsum('kf,kf->k', steered.imag,
+                                                                                 steered.imag)
+            self._srp = self.smoothing * self._srp + (1 - self.smoothing) * srp / srp.max()
+            self.direction = int(np.argmax(self._srp))
+
+        beam = np.einsum('nf,nf->f', self._align[self.direction], spectrum) / self.n_channels
+        y = np.fft.irfft(beam, n=self.n_fft).astype(np.float32)
+        y[:self._tail.size] += self._tail
+        self._tail = y[len(x):].copy() if len(x) == self.blocksize else np.zeros_like(self._tail)
+
+        if out is None:
+            out = np.empty(len(x), dtype=np.int16)
+        np.clip(y[:len(x)], -32768, 32767, out=y[:len(x)])
+        out[:] = y[:len(x)]
+        return out
+
+
+def benchmark(argv=None):
+    """Mide el coste por bloque con audio sintético: ``python src/beamform.py --channels 4``."""
+    parser = argparse.ArgumentParser(description="Real-time CPU budget of the beamforming front end")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--radius", type=float, default=0.05, help="circular array radius (m)")
+    parser.add_argument("--samplerate", type=int, default=16_000)
+    parser.add_argument("--frame-ms", type=int, default=30)
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--azimuth", type=float, default=120.0, help="simulated source azimuth (deg)")
+    parser.add_argument("--budget", type=float, default=0.25,
+                        help="maximum fraction of one core per audio second")
+    args = parser.parse_args(argv)
+
+    sr = args.samplerate
+    blocksize = sr * args.frame_ms // 1000
+    positions = circular_array(args.channels, args.radius)
+    bf = DelayAndSumBeamformer(positions, sr, blocksize)
+
+    # Fuente de banda ancha en campo lejano + ruido independiente por canal
+    rng = np.random.default_rng(0)
+    n = blocksize * args.blocks
+    source = rng.standard_normal(n + 64) * 3000
+    d = np.array([np.cos(np.deg2rad(args.azimuth)), np.sin(np.deg2rad(args.azimuth))])
+    delays = -(positions @ d) / SPEED_OF_SOUND * sr
+    spectrum = np.fft.rfft(source)
+    freqs = np.fft.rfftfreq(len(source))
+    channels = [np.fft.irfft(spectrum * np.exp(-2j * np.pi * freqs * (k + 32)), len(source))[:n] for k in delays]
+    audio = (np.stack(channels, axis=1) + rng.standard_normal((n, args.channels)) * 1000).astype(np.int16)
+
+    out = np.empty(blocksize, dtype=np.int16)
+    t0 = time.process_time()
+    for i in range(args.blocks):
+        bf.process(audio[i * blocksize:(i + 1) * blocksize], out)
+    cpu = time.process_time() - t0
+
+    audio_s = n / sr
+    per_block_ms = cpu / args.blocks * 1000
+    print(f"{args.channels} ch, {blocksize} samples/block: {per_block_ms:.3f} ms CPU per {args.frame_ms} ms block "
+          f"({cpu / audio_s * 100:.1f}% of one core), DOA {bf.azimuth_deg:.0f} deg (true {args.azimuth:.0f})")
+    return 0 if cpu / audio_s <= args.budget else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(benchmark())
@@ -0,0 +1,394 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Captura y VAD en un proceso aparte, con el buffer circular en memoria compartida.
+
+El proceso hijo abre el micrófono, aplica el front end multicanal y el VAD, y
+escribe bloques, instantes y decisiones de voz en un segmento
+``multiprocessing.shared_memory``. El proceso del componente (Qt, Ice, cliente
+HTTP) lee ese mismo buffer sin copias a través de :class:`ProcessAudioCapture`,
+que tiene la interfaz de :class:`audiocapture.AudioCapture`. Así el callback de
+PortAudio no compite por el GIL con el resto del componente.
+
+Medida antes/después (``--process`` mueve la captura al proceso hijo)::
+
+    python src/captureproc.py --seconds 30 --load-threads 4
+    python src/captureproc.py --seconds 30 --load-threads 4 --process
+"""
+
+import argparse
+import functools
+import multiprocessing as mp
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from audiocapture import AudioCapture, ReplayInputStream
+
+# Cabecera int64 del segmento compartido
+WRITE, READ, VAD_LEVEL, OVERRUNS, UNDERRUNS, DROPPED, MAX_DEPTH, DOA = range(8)
+HEADER_SLOTS = 8
+
+
+class SharedRing:
+    """Disposición del segmento: cabecera, instantes, decisiones de VAD y bloques."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, blocksize: int):
+        self.shm = shm
+        offset = 0
+        self.header = np.ndarray(HEADER_SLOTS, dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += self.header.nbytes
+        self.stamps = np.ndarray(capacity, dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += self.stamps.nbytes
+        # -1 = sin decidir; si no, nivel de agresividad * 2 + (1 si hay voz)
+        self.flags = np.ndarray(capacity, dtype=np.int8, buffer=shm.buf, offset=offset)
+        offset += -(-capacity // 8) * 8
+        self.frames = np.ndarray((capacity, blocksize), dtype=np.int16, buffer=shm.buf, offset=offset)
+
+    @staticmethod
+    def size(capacity: int, blocksize: int) -> int:
+        return HEADER_SLOTS * 8 + capacity * 8 + -(-capacity // 8) * 8 + capacity * blocksize * 2
+
+    def release(self):
+        # Las vistas deben desaparecer antes de cerrar el segmento
+        self.header = self.stamps = self.flags = self.frames = None
+        self.shm.close()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: el hijo comparte el resource_tracker del padre, que lo registra una sola vez
+        return shared_memory.SharedMemory(name=name)
+
+
+class _ChildCapture(AudioCapture):
+    """AudioCapture del proceso hijo: escribe en el segmento compartido."""
+
+    def __init__(self, ring: SharedRing, **kwargs):
+        super().__init__(**kwargs)
+        self.ring = ring
+        self._ring = ring.frames
+        self._stamps = ring.stamps
+        self._write_index = int(ring.header[WRITE])
+
+    @property
+    def depth(self) -> int:
+        # El lector está en el otro proceso: publica su posición en la cabecera
+        return max(0, self._write_index - int(self.ring.header[READ]))
+
+
+def _child_main(shm_name: str, config: dict, conn, stop):
+    """Proceso hijo: captura, front end y VAD; avisa al padre de cada lote publicado."""
+    from vad import create_vad
+
+    shm = _attach(shm_name)
+    ring = SharedRing(shm, config["capacity"], config["blocksize"])
+    header = ring.header
+    capture = _ChildCapture(ring, samplerate=config["samplerate"], channels=config["channels"],
+                            frame_ms=config["frame_ms"], capacity_s=config["capacity_s"],
+                            device=config["device"], drop_policy=config["drop_policy"],
+                            stream_factory=config["stream_factory"], frontend=config["frontend"],
+                            device_rate=config["device_rate"])
+    try:
+        capture.start()
+    except Exception as e:
+        conn.send(f"{type(e).__name__}: {e}")
+        ring.release()
+        return
+    conn.send(None)
+
+    vad_kind = config["vad_kind"]
+    vads = {}
+    published = capture.write_index
+    try:
+        while not stop.is_set():
+            if not capture.wait_for(published, timeout=0.1):
+                if not capture.running:
+                    break
+                continue
+            head = capture.write_index
+            level = int(header[VAD_LEVEL])
+            vad = vads.get(level)
+            if vad is None and vad_kind and level >= 0:
+                try:
+                    vad = vads[level] = create_vad(vad_kind, level, capture.samplerate, config["vad_params"])
+                except Exception as e:
+                    print(f"[AUDIO] VAD del proceso de captura desactivado: {e}", file=sys.stderr)
+                    vad_kind = None
+            # Si el productor nos ha dado la vuelta, sólo se decide lo que sigue en el buffer
+            index = max(published, head - capture.capacity + 1)
+            while index < head:
+                frames = capture.frames(index, head - index)
+                rows = np.arange(index, index + len(frames)) % capture.capacity
+                if vad is not None:
+                    try:
+                        ring.flags[rows] = level * 2 + vad.is_speech_batch(frames)
+                    except Exception as e:
+                        # Un fallo del VAD no debe parar la captura: el padre decide con el suyo
+                        print(f"[AUDIO] VAD del proceso de captura desactivado: {e}", file=sys.stderr)
+                        vad = None
+                        vads.clear()
+                        vad_kind = None
+                        ring.flags[rows] = -1
+                else:
+                    ring.flags[rows] = -1
+                index += len(frames)
+            published = head
+
+            header[OVERRUNS] = capture.overruns
+            header[UNDERRUNS] = capture.underruns
+            header[DROPPED] = capture.frames_dropped
+            header[MAX_DEPTH] = capture.max_depth
+            if capture.frontend is not None:
+                header[DOA] = int(round(capture.frontend.azimuth_deg))
+            header[WRITE] = head
+            conn.send_bytes(b"\0")
+    except (BrokenPipeError, OSError):
+        pass  # el padre ha cerrado la conexión
+    finally:
+        capture.stop()
+        ring.release()
+
+
+class ProcessAudioCapture(AudioCapture):
+    """:class:`AudioCapture` cuyo productor es un proceso hijo (ver el módulo).
+
+    ``frame``/``frames``/``stamp`` son vistas del segmento compartido. Además,
+    ``speech_flags`` devuelve las decisiones que el hijo ya tomó con el VAD
+    ``vad_kind`` al nivel pedido con ``request_vad``. ``stream_factory`` y
+    ``frontend`` se envían al hijo, así que deben poder serializarse.
+    """
+
+    def __init__(self, *args, vad_kind: str | None = "webrtc", vad_params: dict | None = None,
+                 start_timeout_s: float = 10.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.vad_kind = vad_kind
+        self.vad_params = vad_params or {}
+        self.start_timeout_s = start_timeout_s
+        self._shm = shared_memory.SharedMemory(create=True,
+                                               size=SharedRing.size(self.capacity, self.blocksize))
+        self._shared = SharedRing(self._shm, self.capacity, self.blocksize)
+        self._shared.header[:] = 0
+        self._shared.header[VAD_LEVEL] = -1
+        self._shared.flags[:] = -1
+        self._ring = self._shared.frames
+        self._stamps = self._shared.stamps
+        self._conn = None
+        self._stop_event = None
+        self._pump = None
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None and self._stream.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        ctx = mp.get_context("spawn")
+        recv, send = ctx.Pipe(duplex=False)
+        stop = ctx.Event()
+        config = {"samplerate": self.samplerate, "channels": self.channels, "frame_ms": self.frame_ms,
+                  "capacity_s": self.capacity * self.frame_ms / 1000, "capacity": self.capacity,
+                  "blocksize": self.blocksize, "device": self.device, "drop_policy": self.drop_policy,
+                  "stream_factory": self.stream_factory, "frontend": self.frontend, "device_rate": self.device_rate,
+                  "vad_kind": self.vad_kind, "vad_params": self.vad_params}
+        self._shared.header[WRITE] = self._write_index
+        self._shared.header[READ] = self._write_index
+        process = ctx.Process(target=_child_main, args=(self._shm.name, config, send, stop),
+                              name="ebo_asr-capture", daemon=True)
+        process.start()
+        send.close()
+        try:
+            if not recv.poll(self.start_timeout_s):
+                raise TimeoutError("el proceso de captura no arrancó a tiempo")
+            error = recv.recv()
+        except (EOFError, TimeoutError) as e:
+            error = str(e) or "el proceso de captura terminó al arrancar"
+        if error is not None:
+            stop.set()
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+            recv.close()
+            raise RuntimeError(error)
+
+        self._conn, self._stop_event, self._stream = recv, stop, process
+        self._pump = threading.Thread(target=self._pump_loop, args=(process, recv), name="capture-pump",
+                                      daemon=True)
+        self._pump.start()
+        rate = f"{self.device_rate} Hz -> {self.samplerate} Hz" if self.device_rate else f"{self.samplerate} Hz"
+        print(f"[AUDIO] Capture process {process.pid} started: {rate}, {self.frame_ms} ms frames, "
+              f"ring={self.capacity * self.frame_ms / 1000:.1f}s (shared memory)")
+
+    def stop(self):
+        process, self._stream = self._stream, None
+        if process is not None:
+            self._stop_event.set()
+            process.join(2.0)
+            if process.is_alive():
+                print("[AUDIO] El proceso de captura no terminó; se fuerza", file=sys.stderr)
+                process.terminate()
+                process.join(1.0)
+            self._conn.close()
+            self._pump.join(1.0)
+        with self._cond:
+            self._cond.notify_all()
+
+    def close(self):
+        """Para el hijo y libera la memoria compartida."""
+        self.stop()
+        self._ring = np.zeros_like(self._ring)
+        self._stamps = np.zeros_like(self._stamps)
+        self._shared.release()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    # Despierta a los lectores cada vez que el hijo publica bloques nuevos
+    def _pump_loop(self, process, conn):
+        header = self._shared.header
+        while True:
+            try:
+                conn.recv_bytes()
+            except (EOFError, OSError):
+                break
+            head = int(header[WRITE])
+            consumer = self._consumer
+            header[READ] = consumer.index if consumer is not None else head
+            with self._cond:
+                self._write_index = head
+                self._cond.notify_all()
+        if self._stream is process:
+            print(f"[AUDIO] El proceso de captura terminó (código {process.exitcode})", file=sys.stderr)
+            self._stream = None
+            with self._cond:
+                self._cond.notify_all()
+
+    def request_vad(self, aggressiveness: int):
+        self._shared.header[VAD_LEVEL] = aggressiveness
+
+    def speech_flags(self, index: int, count: int, aggressiveness: int):
+        flags = self._shared.flags[np.arange(index, index + count) % self.capacity]
+        if np.any(flags < 0) or np.any(flags >> 1 != aggressiveness):
+            return None
+        return (flags & 1).astype(bool)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        header = self._shared.header
+        stats["overruns"] += int(header[OVERRUNS])
+        stats["underruns"] += int(header[UNDERRUNS])
+        stats["frames_dropped"] += int(header[DROPPED])
+        stats["max_queue_depth"] = max(stats["max_queue_depth"], int(header[MAX_DEPTH]))
+        if self.frontend is not None:
+            stats["doa_deg"] = int(header[DOA])
+        return stats
+
+
+def _hog(stop: threading.Event):
+    # Carga de Python puro: retiene el GIL como el cliente HTTP, Ice o la codificación
+    x = 0
+    while not stop.is_set():
+        for i in range(10_000):
+            x += i * i
+
+
+def benchmark(argv=None):
+    """Desbordamientos y latencia de entrega (bloque capturado → lector) con carga en el proceso."""
+    parser = argparse.ArgumentParser(description="Capture overflow/latency with and without the capture process")
+    parser.add_argument("--process", action="store_true", help="capture and VAD in a separate process")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--load-threads", type=int, default=4, help="pure-Python threads competing for the GIL")
+    parser.add_argument("--replay", action="store_true", help="synthetic audio instead of the microphone")
+    parser.add_argument("--vad", default="webrtc", help="VAD kind run on every block ('' = none)")
+    args = parser.parse_args(argv)
+
+    factory = None
+    if args.replay:
+        rng = np.random.default_rng(0)
+        noise = (rng.standard_normal(int(16_000 * (args.seconds + 5))) * 300).astype(np.int16)
+        factory = functools.partial(ReplayInputStream, noise, lead_silence_s=0.0, tail_silence_s=0.0)
+    kwargs = dict(samplerate=16_000, channels=1, frame_ms=30, capacity_s=10.0, stream_factory=factory)
+    if args.process:
+        capture = ProcessAudioCapture(vad_kind=args.vad or None, **kwargs)
+        vad = None
+    else:
+        capture = AudioCapture(**kwargs)
+        vad = None
+        if args.vad:
+            from vad import create_vad
+            vad = create_vad(args.vad, 3, 16_000)
+
+    stop = threading.Event()
+    hogs = [threading.Thread(target=_hog, args=(stop,), daemon=True) for _ in range(args.load_threads)]
+    capture.start()
+    for t in hogs:
+        t.start()
+    if args.process:
+        capture.request_vad(3)
+
+    reader = capture.reader()
+    delays, stamps = [], []
+    local_vad = 0
+    end = time.monotonic() + args.seconds
+    try:
+        while time.monotonic() < end:
+            batch = reader.next_batch(4, timeout=0.5)
+            if batch is None:
+                continue
+            now = time.monotonic()
+            first = reader.index - len(batch)
+            batch_stamps = [capture.stamp(i) for i in range(first, reader.index)]
+            delays.extend(now - t for t in batch_stamps)
+            stamps.extend(batch_stamps)
+            flags = capture.speech_flags(first, len(batch), 3) if args.process else None
+            if flags is None and vad is not None:
+                vad.is_speech_batch(batch)
+                local_vad += len(batch)
+    finally:
+        stop.set()
+        capture.release(reader)
+        stats = capture.stats()
+        if args.process:
+            capture.close()
+        else:
+            capture.stop()
+
+    ms = np.array(delays) * 1000
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99)) if ms.size else (0.0, 0.0, 0.0)
+    # Retraso del productor: cuánto se desvía cada bloque de su periodo (callback esperando el GIL)
+    jitter = np.abs(np.diff(stamps) * 1000 - capture.frame_ms) if len(stamps) > 1 else np.zeros(1)
+    print(f"{'process' if args.process else 'in-process'} capture, {args.load_threads} load threads: "
+          f"blocks={stats['frames_captured']} overruns={stats['overruns']} dropped={stats['frames_dropped']} "
+          f"underruns={stats['underruns']} delivery p50={p50:.1f} p95={p95:.1f} p99={p99:.1f} "
+          f"max={ms.max() if ms.size else 0:.1f} ms, producer jitter p99={np.percentile(jitter, 99):.1f} "
+          f"max={jitter.max():.1f} ms (local VAD on {local_vad} blocks)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(benchmark())
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import functools
+import sys
+from pathlib import Path
+
+import numpy as np
+
+TEMPLATE_SUFFIXES = (".wav", ".flac")
+INDEX_FILE = "index.npz"
+HOP_MS = 10
+
+
+@functools.lru_cache(maxsize=4)
+def _mel_dct(samplerate: int, n_fft: int, n_mels: int, n_mfcc: int):
+    """Banco de filtros mel triangulares y matriz DCT-II (sin c0)."""
+    def hz_to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    mels = np.linspace(hz_to_mel(60.0), hz_to_mel(samplerate / 2 * 0.95), n_mels + 2)
+    bins = np.floor((n_fft + 1) * 700.0 * (10 ** (mels / 2595.0) - 1) / samplerate).astype(int)
+    fbank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        lo, mid, hi = bins[m - 1], bins[m], bins[m + 1]
+        fbank[m - 1, lo:mid] = (np.arange(lo, mid) - lo) / max(1, mid - lo)
+        fbank[m - 1, mid:hi] = (hi - np.arange(mid, hi)) / max(1, hi - mid)
+    k = np.arange(1, n_mfcc + 1)[:, np.newaxis]
+    dct = np.cos(np.pi * k * (np.arange(n_mels) + 0.5) / n_mels).astype(np.float32)
+    return fbank, dct
+
+
+def mfcc(pcm, samplerate: int, n_mfcc: int = 12, n_mels: int = 26, win_ms: int = 25, hop_ms: int = HOP_MS,
+         trim_db: float = 30.0) -> np.ndarray:
+    """MFCC (c1..c``n_mfcc``) de la parte con voz de ``pcm`` int16, con CMVN por locución.
+
+    Se recortan los extremos cuya energía queda ``trim_db`` por debajo del pico,
+    así plantillas y locuciones se comparan sin el pre-roll ni el silencio final.
+    """
+    win = int(samplerate * win_ms / 1000)
+    hop = int(samplerate * hop_ms / 1000)
+    x = np.asarray(pcm, dtype=np.float32) / 32768.0
+    if x.size < win:
+        return np.zeros((0, n_mfcc), dtype=np.float32)
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])
+    n_fft = 1 << (win - 1).bit_length()
+    frames = np.lib.stride_tricks.sliding_window_view(x, win)[::hop] * np.hamming(win).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2
+
+    energy_db = 10 * np.log10(power.sum(axis=1) + 1e-10)
+    voiced = np.flatnonzero(energy_db >= energy_db.max() - trim_db)
+    power = power[voiced[0]:voiced[-1] + 1]
+
+    fbank, dct = _mel_dct(samplerate, n_fft, n_mels, n_mfcc)
+    feats = np.log(power @ fbank.T + 1e-10) @ dct.T
+    feats -= feats.mean(axis=0)
+    feats /= feats.std(axis=0) + 1e-5
+    return feats.astype(np.float32)
+
+
+def dtw_batch(query, templates, lengths, open_end: bool = False) -> np.ndarray:
+    """Distancia DTW normalizada de ``query`` (N, d) a cada plantilla de ``templates`` (T, L, d).
+
+    Pasos (1,1), (1,2) y (2,1): la pendiente queda entre 1/2 y 2 y cada fila sólo
+    depende de las dos anteriores, así que se vectoriza sobre plantillas y columnas.
+    Las plantillas más cortas que ``L`` van rellenas; ``lengths`` da su longitud real.
+    Con ``open_end`` la plantilla puede acabar en cualquier trama de la consulta
+    (la consulta empieza por la plantilla y sigue con otra cosa).
+    """
+    n = len(query)
+    n_templates, width, _ = templates.shape
+    if n == 0:
+        return np.full(n_templates, np.inf)
+    # Distancia euclídea entre cada trama de la consulta y cada trama de cada plantilla
+    q2 = np.einsum('nd,nd->n', query, query)
+    t2 = np.einsum('tld,tld->tl', templates, templates)
+    cost = q2[:, None, None] + t2[None] - 2 * np.einsum('nd,tld->ntl', query, templates)
+    cost = np.sqrt(np.maximum(cost, 0.0))
+    cost[:, np.arange(width)[None, :] >= lengths[:, None]] = np.inf
+
+    # Dos columnas de relleno a la izquierda para los saltos j-1 y j-2
+    prev2 = np.full((n_templates, width + 2), np.inf)
+    prev = np.full((n_templates, width + 2), np.inf)
+    prev[:, 2] = cost[0, :, 0]
+    rows = np.arange(n_templates)
+    best_end = np.full(n_templates, np.inf)
+    for i in range(1, n):
+        best = np.minimum(np.minimum(prev[:, 1:-1], prev[:, :-2]), prev2[:, 1:-1])
+        cur = np.full_like(prev, np.inf)
+        cur[:, 2:] = cost[i] + best
+        prev2, prev = prev, cur
+        if open_end:
+            best_end = np.minimum(best_end, cur[rows, lengths + 1] / ((i + 1 + lengths) / 2))
+    if open_end:
+        return best_end
+    return prev[rows, lengths + 1] / ((n + lengths) / 2)
+
+
+class CommandRecognizer:
+    """Reconocedor de órdenes cortas por plantillas (MFCC + DTW), sin red.
+
+    ``templates_dir`` tiene un subdirectorio por frase con grabaciones de ejemplo
+    (``para/1.wav``, ``ven aquí/1.wav``...). Las MFCC de las plantillas se guardan
+    en ``index.npz`` y sólo se recalculan si cambian los ficheros. ``match``
+    devuelve la frase si la mejor distancia es menor que ``max_distance`` y la
+    siguiente frase queda al menos ``margin`` veces más lejos.
+    """
+
+    def __init__(self, templates_dir: str, samplerate: int = 16_000, phrases=None,
+                 max_distance: float = 2.0, margin: float = 1.2, max_duration_s: float = 1.5):
+        self.samplerate = samplerate
+        self.max_distance = max_distance
+        self.margin = margin
+        self.max_duration_s = max_duration_s
+
+        labels, feats = self._load_index(Path(templates_dir), phrases)
+        if not feats:
+            raise ValueError(f"No hay plantillas de órdenes en {templates_dir}")
+        self.phrases = sorted(set(labels))
+        self._labels = np.array([self.phrases.index(label) for label in labels])
+        self._lengths = np.array([len(f) for f in feats])
+        self._templates = np.zeros((len(feats), self._lengths.max(), feats[0].shape[1]), dtype=np.float32)
+        for i, f in enumerate(feats):
+            self._templates[i, :len(f)] = f
+        print(f"[ASR] {len(feats)} plantillas de órdenes para {len(self.phrases)} frases")
+
+    def _load_index(self, root: Path, phrases):
+        files = sorted(f for f in root.glob("*/*") if f.suffix.lower() in TEMPLATE_SUFFIXES
+                       and (not phrases or f.parent.name in phrases))
+        signature = "\n".join(f"{f.relative_to(root)}:{f.stat().st_mtime_ns}:{self.samplerate}" for f in files)
+
+        index = root / INDEX_FILE
+        if index.exists():
+            try:
+                with np.load(index, allow_pickle=False) as cached:
+                    if str(cached["signature"]) == signature:
+                        return list(cached["labels"]), np.split(cached["feats"], cached["offsets"][1:-1])
+            except (OSError, KeyError, ValueError):
+                pass
+
+        # Sólo hace falta decodificar si la caché de plantillas no vale
+        import soundfile as sf
+        labels, feats = [], []
+        for f in files:
+            pcm, sr = sf.read(f, dtype='int16', always_2d=True)
+            if sr != self.samplerate:
+                print(f"[ASR] Plantilla {f} ignorada: {sr} Hz (se espera {self.samplerate})", file=sys.stderr)
+                continue
+            feat = mfcc(pcm[:, 0], sr)
+            if len(feat):
+                labels.append(f.parent.name)
+                feats.append(feat)
+        if feats:
+            try:
+                np.savez(index, signature=signature, labels=np.array(labels),
+                         feats=np.concatenate(feats), offsets=np.cumsum([0] + [len(f) for f in feats]))
+            except OSError as e:
+                print(f"[ASR] No se pudo guardar {index}: {e}", file=sys.stderr)
+        return labels, feats
+
+    def match(self, pcm, open_end: bool = False) -> tuple | None:
+        """Devuelve ``(frase, distancia)`` si ``pcm`` es una orden conocida con confianza, si no ``None``.
+
+        Con ``open_end`` basta con que ``pcm`` *empiece* por la frase (palabra de
+        activación seguida de la petición); sólo se mira el principio de la locución.
+        """
+        if open_end:
+            feats = mfcc(pcm[:int((self.max_duration_s + 0.5) * self.samplerate)], self.samplerate)
+        else:
+            # Descarte barato de locuciones largas (el pcm trae pre-roll y silencio final)
+            if len(pcm) > (self.max_duration_s + 1.5) * self.samplerate:
+                return None
+            feats = mfcc(pcm, self.samplerate)
+            if len(feats) * HOP_MS > self.max_duration_s * 1000:
+                return None
+        if not len(feats):
+            return None
+        dist = dtw_batch(feats, self._templates, self._lengths, open_end)
+        # Mejor distancia por frase
+        per_phrase = np.full(len(self.phrases), np.inf)
+        np.minimum.at(per_phrase, self._labels, dist)
+        order = np.argsort(per_phrase)
+        best = per_phrase[order[0]]
+        runner_up = per_phrase[order[1]] if len(order) > 1 else np.inf
+        if best <= self.max_distance and runner_up >= self.margin * best:
+            return self.phrases[order[0]], float(best)
+        return None
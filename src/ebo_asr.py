@@ -58,12 +58,17 @@
 import argparse
 # Ctrl+c handling
 import signal
+import sys
 
-from rich.console import Console
-console = Console()
+# El perfil de arranque tiene que empezar antes de los imports que mide
+import startup
+if '--profile-startup' in sys.argv:
+    startup.profile.start()
 
-import interfaces
-from specificworker import *
+with startup.stage("import interfaces (Ice, Slice)"):
+    import interfaces
+with startup.stage("import specificworker"):
+    from specificworker import *
 
 #SIGNALS handler
 def sigint_handler(*args):
@@ -75,18 +80,31 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('iceconfigfile', nargs='?', type=str, default='etc/config')
     parser.add_argument('--startup-check', action='store_true')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print the time spent in each import and initialization stage')
 
     args = parser.parse_args()
-    interface_manager = interfaces.InterfaceManager(args.iceconfigfile)
+    with startup.stage("Ice communicator and proxies"):
+        interface_manager = interfaces.InterfaceManager(args.iceconfigfile)
 
     if interface_manager.status == 0:
-        worker = SpecificWorker(interface_manager.get_proxies_map(), args.startup_check)
-        worker.setParams(interface_manager.parameters)
+        with startup.stage("worker"):
+            worker = SpecificWorker(interface_manager.get_proxies_map(), args.startup_check, defer_init=True)
+            try:
+                worker.setParams(interface_manager.parameters)
+            except ValueError as e:
+                print(f"Error reading config params: {e}", file=sys.stderr)
+                sys.exit(-1)
     else:
         print("Error getting required connections, check config file")
         sys.exit(-1)
 
-    interface_manager.set_default_hanlder(worker)
+    with startup.stage("Ice adapter"):
+        interface_manager.set_default_hanlder(worker)
+    startup.profile.mark("serving")
+    # Backend, micrófono y plantillas se cargan ya con el adaptador atendiendo peticiones
+    if not args.startup_check:
+        worker.initialize_async()
     signal.signal(signal.SIGINT, sigint_handler)
     app.exec_()
     interface_manager.destroy()
@@ -29,7 +29,8 @@ if len(ROBOCOMP)<1:
     raise RuntimeError('ROBOCOMP environment variable not set! Exiting.')
 
 
-Ice.loadSlice("-I ./src/ --all ./src/EboASR.ice")
+import slicecache
+slicecache.load("EboASR.ice")
 
 from RoboCompEboASR import *
 
@@ -43,3 +44,33 @@ class EboASRI(EboASR):
 
     def stopListening(self, c):
         return self.worker.EboASR_stopListening()
+
+    def startListening(self, c):
+        return self.worker.EboASR_startListening()
+
+    def getResult(self, jobId, c):
+        return self.worker.EboASR_getResult(jobId)
+
+    def waitResult(self, jobId, timeoutMs, c):
+        return self.worker.EboASR_waitResult(jobId, timeoutMs)
+
+    def getAudioStats(self, c):
+        return self.worker.EboASR_getAudioStats()
+
+    def getMetrics(self, c):
+        return self.worker.EboASR_getMetrics()
+
+    def getEndpointing(self, c):
+        return self.worker.EboASR_getEndpointing()
+
+    def getListenState(self, c):
+        return self.worker.EboASR_getListenState()
+
+    def setContinuous(self, enabled, c):
+        return self.worker.EboASR_setContinuous(enabled)
+
+    def setRobotSpeaking(self, speaking, c):
+        return self.worker.EboASR_setRobotSpeaking(speaking)
+
+    def transcribeAudio(self, pcm, samplerate, lang, c):
+        return self.worker.EboASR_transcribeAudio(pcm, samplerate, lang)
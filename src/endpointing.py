@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+from collections import deque
+
+import numpy as np
+
+from vad import frame_features
+
+
+class AdaptiveEndpointing:
+    """Ajusta en línea la agresividad del VAD, la activación y el silencio de fin de turno.
+
+    - Suelo de ruido: percentil ``noise_percentile`` del RMS (dBFS) de los bloques
+      de los últimos ``noise_window`` bloques capturados. Entre ``noise_db[0]``
+      (sala silenciosa) y ``noise_db[1]`` (pasillo ruidoso), la agresividad del VAD
+      y la voz exigida para activar suben de sus mínimos a sus máximos.
+    - Pausas: duración de los silencios dentro de las locuciones recientes. El
+      silencio de fin de turno es su percentil ``pause_percentile`` más
+      ``pause_margin_s``, acotado a ``end_silence_s``. Como las pausas más largas
+      que el umbral cierran el turno y no se ven, si la voz vuelve poco después de
+      un fin de turno ese hueco también cuenta como pausa (corte prematuro).
+    """
+
+    def __init__(self, frame_ms: int, default_end_silence_s: float = 0.7,
+                 end_silence_s=(0.35, 1.0), activation_ms=(120, 300), aggressiveness=(1, 3),
+                 noise_db=(-60.0, -40.0), noise_percentile: float = 20, noise_window: int = 1000,
+                 pause_percentile: float = 95, pause_margin_s: float = 0.15, min_pauses: int = 10):
+        self.frame_ms = frame_ms
+        self.default_end_silence_s = default_end_silence_s
+        self.end_silence_bounds = end_silence_s
+        self.activation_bounds = activation_ms
+        self.aggressiveness_bounds = aggressiveness
+        self.noise_db = noise_db
+        self.noise_percentile = noise_percentile
+        self.pause_percentile = pause_percentile
+        self.pause_margin_s = pause_margin_s
+        self.min_pauses = min_pauses
+
+        self.noise_floor_db = noise_db[0]
+        self.saved_s = 0.0
+        self.turns = 0
+        self.early_endpoints = 0
+        self._noise = deque(maxlen=noise_window)
+        self._pauses = deque(maxlen=200)
+        self._last_voice = None
+        self._lock = threading.Lock()
+
+    def observe_noise(self, frames):
+        """Añade bloques int16 ``(n, blocksize)`` al estimador del suelo de ruido."""
+        if not len(frames):
+            return
+        rms, _zcr = frame_features(frames)
+        db = 20 * np.log10(rms / 32768.0 + 1e-9)
+        with self._lock:
+            self._noise.extend(db.tolist())
+            self.noise_floor_db = float(np.percentile(np.fromiter(self._noise, dtype=float),
+                                                      self.noise_percentile))
+
+    def observe_pause(self, seconds: float):
+        with self._lock:
+            self._pauses.append(seconds)
+
+    def speech_started(self, stamp: float):
+        """Inicio de voz de un turno; si llega justo tras el anterior, el corte fue prematuro."""
+        last, self._last_voice = self._last_voice, None
+        if last is not None and 0 < stamp - last < 2 * self.end_silence_bounds[1]:
+            self.early_endpoints += 1
+            self.observe_pause(stamp - last)
+
+    def turn_ended(self, last_voice_stamp: float, end_silence_s: float) -> float:
+        """Cierra un turno con voz y devuelve lo ahorrado (s) frente al silencio fijo."""
+        self._last_voice = last_voice_stamp
+        saving = self.default_end_silence_s - end_silence_s
+        with self._lock:
+            self.saved_s += saving
+            self.turns += 1
+        return saving
+
+    def _noisiness(self) -> float:
+        quiet, loud = self.noise_db
+        return float(np.clip((self.noise_floor_db - quiet) / (loud - quiet), 0.0, 1.0))
+
+    @property
+    def vad_aggressiveness(self) -> int:
+        lo, hi = self.aggressiveness_bounds
+        return int(round(lo + self._noisiness() * (hi - lo)))
+
+    @property
+    def activation_ms(self) -> int:
+        lo, hi = self.activation_bounds
+        ms = lo + self._noisiness() * (hi - lo)
+        return int(round(ms / self.frame_ms)) * self.frame_ms
+
+    @property
+    def end_silence_s(self) -> float:
+        lo, hi = self.end_silence_bounds
+        with self._lock:
+            pauses = list(self._pauses)
+        if len(pauses) < self.min_pauses:
+            return float(np.clip(self.default_end_silence_s, lo, hi))
+        return float(np.clip(np.percentile(pauses, self.pause_percentile) + self.pause_margin_s, lo, hi))
@@ -19,7 +19,7 @@
 #    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
 
 import sys, Ice, os
-from PySide6 import QtWidgets, QtCore
+from PySide6 import QtCore
 
 ROBOCOMP = ''
 try:
@@ -28,7 +28,8 @@ except KeyError:
     print('$ROBOCOMP environment variable not set, using the default value /opt/robocomp')
     ROBOCOMP = '/opt/robocomp'
 
-Ice.loadSlice("-I ./src/ --all ./src/CommonBehavior.ice")
+import slicecache
+slicecache.load("CommonBehavior.ice")
 import RoboCompCommonBehavior
 
 
@@ -42,6 +43,8 @@ class GenericWorker(QtCore.QObject):
         super(GenericWorker, self).__init__()
 
         self.ledarray_proxy = mprx["LEDArrayProxy"]
+        self.eboasrtopic_proxy = mprx.get("EboASRTopic")
+        self.eboasr_proxy = mprx.get("EboASRProxy")
 
         self.mutex = QtCore.QMutex()
         self.Period = 30
@@ -1,19 +1,32 @@
 import time
 import Ice
 import IceStorm
-from rich.console import Console, Text
-console = Console()
 
-
-Ice.loadSlice("-I ./src/ --all ./src/EboASR.ice")
+import slicecache
+slicecache.load("EboASR.ice")
 import RoboCompEboASR
-Ice.loadSlice("-I ./src/ --all ./src/LEDArray.ice")
+slicecache.load("LEDArray.ice")
 import RoboCompLEDArray
+slicecache.load("EboASRTopic.ice")
+import RoboCompEboASRTopic
 
 
 import eboasrI
 
 
+class _LazyConsole:
+    # rich sólo se importa si hay algo que mostrar (errores de conexión)
+    _console = None
+
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+
+console = _LazyConsole()
+
 
 class Publishes:
     def __init__(self, ice_connector, topic_manager):
@@ -21,6 +34,10 @@ class Publishes:
         self.mprx={}
         self.topic_manager = topic_manager
 
+        # Sin rcnode (TopicManager.Proxy vacío) no se publican eventos
+        if self.topic_manager is not None:
+            self.eboasrtopic = self.create_topic("EboASRTopic", RoboCompEboASRTopic.EboASRTopicPrx)
+
 
     def create_topic(self, topic_name, ice_proxy):
         # Create a proxy to publish a AprilBasedLocalization topic
@@ -52,6 +69,9 @@ class Requires:
         self.mprx={}
 
         self.LEDArray = self.create_proxy("LEDArrayProxy", RoboCompLEDArray.LEDArrayPrx)
+        # Servidor ASR central (ASR.Backend = server); sin EboASRProxy el componente transcribe por su cuenta
+        if self.ice_connector.getProperties().getProperty("EboASRProxy"):
+            self.EboASR = self.create_proxy("EboASRProxy", RoboCompEboASR.EboASRPrx)
 
     def get_proxies_map(self):
         return self.mprx
@@ -97,7 +117,7 @@ class Subscribes:
                     topic = self.topic_manager.create(topic_name)
                     subscribe_done = True
                 except:
-                    console.log(f"Error. Topic {Text(topic_name, style='red')} could not be created. Exiting")
+                    console.log(f"Error. Topic [red]{topic_name}[/red] could not be created. Exiting")
                     status = 0
         qos = {}
         topic.subscribeAndGetPublisher(qos, proxy)
@@ -121,7 +141,7 @@ class InterfaceManager:
         # TODO: Make ice connector singleton
         self.ice_config_file = ice_config_file
         self.ice_connector = Ice.initialize(self.ice_config_file)
-        needs_rcnode = False
+        needs_rcnode = bool(self.ice_connector.getProperties().getProperty("TopicManager.Proxy"))
         self.topic_manager = self.init_topic_manager() if needs_rcnode else None
 
         self.status = 0
@@ -142,7 +162,7 @@ class InterfaceManager:
         try:
             return IceStorm.TopicManagerPrx.checkedCast(obj)
         except Ice.ConnectionRefusedException as e:
-            console.log(Text('Cannot connect to rcnode! This must be running to use pub/sub.', 'red'))
+            console.log('Cannot connect to rcnode! This must be running to use pub/sub.', style='red')
             exit(-1)
 
     def set_default_hanlder(self, handler):
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import sys
+import threading
+
+
+# Colores (red, green, blue, white) de cada estado de escucha
+LED_STATES = {
+    "off": (0, 0, 0, 0),
+    "waiting": (70, 255, 0, 0),        # esperando voz (el color de escucha de siempre)
+    "speech": (0, 255, 60, 0),         # voz detectada, grabando
+    "transcribing": (0, 80, 255, 0),   # audio enviado al backend
+}
+
+
+class LedFeedback:
+    """Envía los estados de los LEDs desde un hilo propio.
+
+    ``set_state`` nunca bloquea: sólo guarda el último estado pedido. El hilo
+    envía con AMI (``setLEDArrayAsync``) el mapa de píxeles precalculado y,
+    mientras una llamada está en vuelo, los cambios intermedios se descartan
+    y sólo se envía el más reciente.
+    """
+
+    def __init__(self, proxy, pixel_type, num_leds: int, timeout_s: float = 1.0):
+        self.proxy = proxy
+        self.timeout_s = timeout_s
+        self._maps = {name: {i: pixel_type(red=r, green=g, blue=b, white=w) for i in range(num_leds)}
+                      for name, (r, g, b, w) in LED_STATES.items()}
+        self._pending = None
+        self._sent = None
+        self._failing = False
+        self._stop = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="leds", daemon=True)
+        self._thread.start()
+
+    @property
+    def state(self):
+        return self._pending
+
+    def set_state(self, name: str):
+        if name not in self._maps:
+            raise ValueError(f"Estado de LEDs desconocido: {name}")
+        with self._cond:
+            self._pending = name
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stop or self._pending != self._sent)
+                if self._stop:
+                    return
+                state = self._pending
+            self._send(state)
+            self._sent = state
+
+    def _send(self, state):
+        if self.proxy is None:
+            return
+        try:
+            future = self.proxy.setLEDArrayAsync(self._maps[state])
+            # Esperamos aquí (no en el hilo de audio) para no acumular llamadas en vuelo
+            future.result(self.timeout_s)
+            if self._failing:
+                print("[LED] LEDs disponibles de nuevo")
+            self._failing = False
+        except Exception as e:
+            if not self._failing:
+                print(f"[LED] No se pudo cambiar LEDs a '{state}': {e}", file=sys.stderr)
+            self._failing = True
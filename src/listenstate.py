@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+import time
+
+IDLE = "idle"
+ARMED = "armed"
+CAPTURING = "capturing"
+TRANSCRIBING = "transcribing"
+DONE = "done"
+CANCELLED = "cancelled"
+
+STATES = (IDLE, ARMED, CAPTURING, TRANSCRIBING, DONE, CANCELLED)
+ACTIVE = (ARMED, CAPTURING, TRANSCRIBING)
+
+# (estado, evento) -> estado siguiente; es la máquina listenMachine de statemachine.smdsl
+TRANSITIONS = {
+    (IDLE, "listen"): ARMED,              # empieza un turno: VAD armado, esperando voz
+    (ARMED, "speech"): CAPTURING,         # el VAD ha visto voz suficiente
+    (ARMED, "no_speech"): DONE,           # la captura terminó sin voz
+    (CAPTURING, "endpoint"): TRANSCRIBING,
+    (TRANSCRIBING, "text"): DONE,         # respuesta del backend (o de las órdenes locales)
+    (TRANSCRIBING, "rejected"): DONE,     # modo continuo: la locución no iba dirigida al robot
+    (ARMED, "error"): DONE,
+    (CAPTURING, "error"): DONE,
+    (TRANSCRIBING, "error"): DONE,
+    (ARMED, "stop"): CANCELLED,           # stopListening, cambio de modo...
+    (CAPTURING, "stop"): CANCELLED,
+    (TRANSCRIBING, "stop"): CANCELLED,
+    (DONE, "reset"): IDLE,
+    (CANCELLED, "reset"): IDLE,
+}
+
+
+class ListenStateMachine:
+    """Estado del turno de escucha, movido por eventos de audio, VAD, RPC y backend.
+
+    ``fire`` aplica una transición de :data:`TRANSITIONS` bajo un lock; un evento
+    que no vale en el estado actual (p. ej. ``speech`` tras un ``stop``) se ignora
+    y devuelve ``False``. ``on_enter(estado, fn)`` registra funciones que se llaman
+    fuera del lock al entrar en un estado. Se acumula cuántas veces se ha entrado
+    en cada estado y cuánto tiempo se ha pasado en él; ``metrics`` (un
+    ``MetricsRegistry``) recibe además cada estancia como ``state_<estado>``.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self._state = IDLE
+        self._since = time.monotonic()
+        self._entries = {s: 0 for s in STATES}
+        self._totals = {s: 0.0 for s in STATES}
+        self._entries[IDLE] = 1
+        self._listeners = {}
+        self._cond = threading.Condition()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def active(self) -> bool:
+        return self._state in ACTIVE
+
+    def on_enter(self, state: str, fn):
+        self._listeners.setdefault(state, []).append(fn)
+
+    def fire(self, event: str) -> bool:
+        with self._cond:
+            prev = self._state
+            new = TRANSITIONS.get((prev, event))
+            if new is None:
+                return False
+            now = time.monotonic()
+            stay = now - self._since
+            self._totals[prev] += stay
+            self._entries[new] += 1
+            self._state, self._since = new, now
+            self._cond.notify_all()
+        if self.metrics is not None and prev != IDLE:
+            self.metrics.observe(f"state_{prev}", stay)
+        for fn in self._listeners.get(new, ()):
+            fn()
+        return True
+
+    def wait_for(self, states, timeout: float | None = None) -> bool:
+        """Espera (sin sondeo) a que el estado sea uno de ``states``."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._state in states, timeout)
+
+    def snapshot(self) -> tuple:
+        """``(estado, segundos en él, {estado: (entradas, segundos totales)})``."""
+        with self._cond:
+            now = time.monotonic()
+            current = now - self._since
+            times = {s: (self._entries[s], self._totals[s] + (current if s == self._state else 0.0))
+                     for s in STATES}
+            return self._state, current, times
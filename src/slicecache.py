@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Código Python de los ``.ice`` generado una vez y reutilizado entre arranques.
+
+``Ice.loadSlice`` analiza y traduce los ``.ice`` cada vez que arranca el
+componente. :func:`load` los traduce todos juntos con slice2py (``IcePy.compile``)
+a un directorio de caché y después sólo importa los módulos generados (con sus
+``.pyc``). La clave del directorio es el contenido de los ``.ice`` y la versión de
+Ice, así que cambiar una interfaz o actualizar Ice regenera el código.
+
+El directorio es ``$EBO_ASR_SLICE_CACHE`` o ``~/.cache/ebo_asr/slice``. Si no se
+puede generar (sin permisos, Ice sin ``IcePy.compile``...) se usa ``Ice.loadSlice``.
+"""
+
+import hashlib
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import Ice
+
+SLICE_DIR = Path(__file__).resolve().parent
+_cache = None
+_loaded = set()
+
+
+def cache_root() -> Path:
+    env = os.environ.get("EBO_ASR_SLICE_CACHE")
+    if env:
+        return Path(env)
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ebo_asr" / "slice"
+
+
+def _include_args() -> list:
+    args = [f"-I{SLICE_DIR}"]
+    ice_dir = getattr(Ice, "getSliceDir", lambda: None)()
+    if ice_dir:
+        args.append(f"-I{ice_dir}")
+    return args
+
+
+def _cache_key(files) -> str:
+    digest = hashlib.sha1(Ice.stringVersion().encode())
+    for f in files:
+        digest.update(f.name.encode())
+        digest.update(f.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _generate(files, target: Path):
+    import IcePy
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".gen-", dir=target.parent))
+    try:
+        status = IcePy.compile(["slice2py", *_include_args(), f"--output-dir={tmp}", *map(str, files)])
+        if status != 0:
+            raise RuntimeError(f"slice2py terminó con código {status}")
+        try:
+            # Otro proceso puede haberlo generado a la vez: vale cualquiera de los dos
+            tmp.rename(target)
+        except OSError:
+            if not target.is_dir():
+                raise
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _cache_dir() -> Path | None:
+    global _cache
+    if _cache is None:
+        files = sorted(SLICE_DIR.glob("*.ice"))
+        target = cache_root() / _cache_key(files)
+        try:
+            if not target.is_dir():
+                _generate(files, target)
+            sys.path.insert(0, str(target))
+            _cache = target
+        except Exception as e:
+            print(f"[ICE] Caché de Slice no disponible, se usa Ice.loadSlice: {e}", file=sys.stderr)
+            _cache = False
+    return _cache or None
+
+
+def load(ice_file: str):
+    """Equivalente a ``Ice.loadSlice("-I ./src/ --all ./src/<ice_file>")`` con el código en caché."""
+    name = Path(ice_file).stem
+    if name in _loaded:
+        return
+    if _cache_dir() is not None:
+        importlib.import_module(f"{name}_ice")
+    else:
+        Ice.loadSlice(" ".join([*_include_args(), "--all", str(SLICE_DIR / Path(ice_file).name)]))
+    _loaded.add(name)
@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Perfil del arranque (``ebo_asr.py --profile-startup``).
+
+Mide cada etapa de inicialización (en el hilo principal y en el de arranque en
+segundo plano) y el tiempo de cada módulo importado por primera vez. El import
+se mide envolviendo ``builtins.__import__``: el tiempo propio de un módulo es el
+total de su import menos el de los módulos que importa a su vez.
+"""
+
+import builtins
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.monotonic()
+        self.stages = []
+        self.imports = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._import = None
+
+    def start(self):
+        """Activa el perfil y empieza a medir los imports (llamar antes de los imports pesados)."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.t0 = time.monotonic()
+        self._import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop_imports(self):
+        if self._import is not None:
+            builtins.__import__, self._import = self._import, None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._import
+        if level or original is None or name in sys.modules and not self._pending_submodules(name, fromlist):
+            return original(name, globals, locals, fromlist, level)
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - t0
+            children = stack.pop()
+            if stack:
+                stack[-1] += total
+            with self._lock:
+                prev_total, prev_self = self.imports.get(name, (0.0, 0.0))
+                self.imports[name] = (prev_total + total, prev_self + total - children)
+
+    @staticmethod
+    def _pending_submodules(name, fromlist) -> bool:
+        # ``from paquete import submódulo`` con el paquete ya cargado también importa
+        module = sys.modules[name]
+        return any(f"{name}.{item}" not in sys.modules and not hasattr(module, item)
+                   for item in fromlist or () if item != "*")
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            t1 = time.monotonic()
+            with self._lock:
+                self.stages.append((name, threading.current_thread().name, t0 - self.t0, t1 - t0))
+
+    def mark(self, name: str):
+        """Instante (desde el inicio) en que se alcanza un hito, sin duración."""
+        if self.enabled:
+            with self._lock:
+                self.stages.append((name, threading.current_thread().name, time.monotonic() - self.t0, 0.0))
+
+    def report(self, top: int = 15, file=None):
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        self.stop_imports()
+        with self._lock:
+            stages = sorted(self.stages, key=lambda s: s[2])
+            imports = sorted(self.imports.items(), key=lambda kv: kv[1][1], reverse=True)
+        print("[STARTUP] stage                                   thread        start ms   took ms", file=file)
+        for name, thread, start, took in stages:
+            print(f"[STARTUP] {name:<40} {thread[:12]:<12} {start * 1000:9.1f} {took * 1000:9.1f}", file=file)
+        print(f"[STARTUP] slowest imports (self ms / with dependencies ms), {len(imports)} modules:", file=file)
+        for name, (total, own) in imports[:top]:
+            print(f"[STARTUP]   {name:<38} {own * 1000:9.1f} {total * 1000:9.1f}", file=file)
+
+
+profile = StartupProfile()
+stage = profile.stage
@@ -0,0 +1,366 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import io
+import queue
+import threading
+import time
+
+import numpy as np
+
+from asrjobs import CancelToken, wait_futures
+
+
+def overlap_words(prev, words, max_words: int = 8) -> int:
+    """Palabras del principio de ``words`` que repiten el final de ``prev`` (sin puntuación ni mayúsculas)."""
+    def norm(ws):
+        return [w.strip(".,;:!?¿¡\"'«»…").lower() for w in ws]
+
+    for k in range(min(max_words, len(prev), len(words)), 0, -1):
+        if norm(prev[-k:]) == norm(words[:k]):
+            return k
+    return 0
+
+
+# Códecs de subida: (formato, subtipo, compression_level de libsndfile, kbps nominales).
+# En Opus, libsndfile traduce compression_level a bitrate (0.9 ≈ 32 kbps a 16 kHz mono).
+CODECS = {
+    "wav": ("WAV", "PCM_16", None, 256),
+    "flac": ("FLAC", "PCM_16", None, 160),
+    "opus32": ("OGG", "OPUS", 0.9, 32),
+    "opus20": ("OGG", "OPUS", 0.95, 20),
+    "opus12": ("OGG", "OPUS", 0.98, 12),
+}
+# De más a menos calidad: la selección automática baja por esta escalera
+CODEC_LADDER = ("flac", "opus32", "opus20", "opus12")
+CODEC_SUFFIXES = {"WAV": ".wav", "FLAC": ".flac", "OGG": ".ogg"}
+
+
+def _open_writer(buf, samplerate: int, codec: str):
+    import soundfile as sf
+    fmt, subtype, level, _kbps = CODECS[codec]
+    kwargs = {} if level is None else {"compression_level": level}
+    return sf.SoundFile(buf, 'w', samplerate, 1, format=fmt, subtype=subtype, **kwargs)
+
+
+def encode(pcm, samplerate: int, codec: str = "flac") -> bytes:
+    """Codifica PCM int16 mono en memoria con ``codec`` (clave de ``CODECS``)."""
+    buf = io.BytesIO()
+    with _open_writer(buf, samplerate, codec) as f:
+        f.write(pcm)
+    return buf.getvalue()
+
+
+def encode_flac(pcm, samplerate: int) -> bytes:
+    """Codifica PCM int16 mono a FLAC en memoria."""
+    return encode(pcm, samplerate, "flac")
+
+
+def codec_suffix(codec: str) -> str:
+    return CODEC_SUFFIXES[CODECS[codec][0]]
+
+
+class IncrementalEncoder:
+    """Codifica en un hilo propio los bloques a medida que llegan.
+
+    ``finish`` cierra el fichero y devuelve sus bytes: al detectar el fin de voz
+    sólo queda codificar el último bloque. ``encode_s`` es el tiempo de hilo
+    dedicado a codificar.
+    """
+
+    def __init__(self, samplerate: int, codec: str = "flac"):
+        self.codec = codec
+        self.samplerate = samplerate
+        self.encode_s = 0.0
+        self.samples = 0
+        self._buf = io.BytesIO()
+        self._queue = queue.SimpleQueue()
+        self._error = None
+        self._aborted = False
+        self._thread = threading.Thread(target=self._run, name="encoder", daemon=True)
+        self._thread.start()
+
+    def feed(self, chunk):
+        """Encola un bloque int16 (el llamante no debe reutilizarlo)."""
+        self.samples += len(chunk)
+        self._queue.put(chunk)
+
+    def _run(self):
+        try:
+            t0 = time.thread_time()
+            with _open_writer(self._buf, self.samplerate, self.codec) as f:
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is None or self._aborted:
+                        break
+                    f.write(chunk)
+            self.encode_s = time.thread_time() - t0
+        except Exception as e:
+            self._error = e
+
+    def finish(self, timeout: float | None = None) -> bytes:
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError("encoder did not finish in time")
+        if self._error is not None:
+            raise self._error
+        return self._buf.getvalue()
+
+    def abort(self):
+        self._aborted = True
+        self._queue.put(None)
+
+
+class CodecSelector:
+    """Elige códec según el caudal de subida medido.
+
+    ``throughput_bps`` es una media móvil de bytes subidos / tiempo de subida de
+    los backends remotos; el bitrate de cada códec también se mide sobre lo que
+    se codifica. Se usa el primero de ``ladder`` cuyo bitrate no supera
+    ``upload_ratio`` veces el caudal (segundos de subida por segundo de audio).
+    Sin medidas todavía, el primero. Con ``codec`` fijo no hay selección.
+    """
+
+    def __init__(self, codec: str = "auto", upload_ratio: float = 0.05, ladder=CODEC_LADDER,
+                 smoothing: float = 0.3):
+        if codec != "auto" and codec not in CODECS:
+            raise ValueError(f"ASR.Codec debe ser auto o uno de {tuple(CODECS)}")
+        self.codec = codec
+        self.upload_ratio = upload_ratio
+        self.ladder = ladder
+        self.smoothing = smoothing
+        self.throughput_bps = None
+        self.bitrate_bps = {name: kbps * 1000 for name, (_f, _s, _l, kbps) in CODECS.items()}
+        self._lock = threading.Lock()
+
+    def _ewma(self, old, new):
+        return new if old is None else (1 - self.smoothing) * old + self.smoothing * new
+
+    def observe_upload(self, nbytes: int, seconds: float):
+        if nbytes > 0 and seconds > 0:
+            with self._lock:
+                self.throughput_bps = self._ewma(self.throughput_bps, nbytes * 8 / seconds)
+
+    def observe_payload(self, codec: str, nbytes: int, audio_s: float):
+        if audio_s > 0:
+            with self._lock:
+                self.bitrate_bps[codec] = self._ewma(self.bitrate_bps[codec], nbytes * 8 / audio_s)
+
+    def choose(self) -> str:
+        if self.codec != "auto":
+            return self.codec
+        with self._lock:
+            if self.throughput_bps is None:
+                return self.ladder[0]
+            budget = self.upload_ratio * self.throughput_bps
+            for name in self.ladder:
+                if self.bitrate_bps[name] <= budget:
+                    return name
+        return self.ladder[-1]
+
+
+class SegmentStreamer:
+    """Transcribe la locución por segmentos mientras la captura continúa.
+
+    Cada vez que el VAD detecta una pausa de ``pause_s`` y el segmento en curso
+    dura al menos ``min_segment_s``, el segmento se cierra y se envía al backend
+    en segundo plano. Al terminar sólo queda por transcribir la cola final.
+    Con ``pause_s=None`` no se cortan segmentos intermedios.
+
+    Si un segmento llega a ``max_segment_s`` sin pausa, se corta en el bloque más
+    silencioso del último segundo y el siguiente segmento empieza ``overlap_s``
+    antes; al unir los textos se quitan las palabras repetidas en el solape. Así
+    una locución larga no tiene límite práctico y, al acabar, sólo queda esperar
+    a la transcripción del último segmento.
+
+    Transcripción especulativa (``speculate_s``): en cuanto el silencio tras la voz
+    llega a ``speculate_s``, el audio pendiente se envía ya, sin esperar al fin de
+    turno. Si la voz vuelve, esa petición se cancela y se especula de nuevo en la
+    siguiente pausa; si no, ``finish`` usa su resultado (o el segmento la adopta).
+    ``transcribe(audio, cancel)`` recibe un ``CancelToken`` por petición. Si
+    ``local_match(pcm)`` reconoce lo grabado hasta la pausa (órdenes locales), no
+    se especula: el fin de turno lo resolverá sin subir nada.
+
+    Cada segmento se codifica con ``codec`` en un :class:`IncrementalEncoder`
+    mientras se graba; los cortes forzados y las especulaciones codifican su
+    audio de una vez. Tras codificar se llama a ``on_encoded(codec, bytes,
+    segundos de audio, segundos de codificación)`` si se ha dado.
+    """
+
+    def __init__(self, transcribe, executor, samplerate: int, frame_ms: int,
+                 pause_s: float | None = 0.3, min_segment_s: float = 1.0, timer=None,
+                 speculate_s: float = 0.0, max_segment_s: float | None = None, overlap_s: float = 0.5,
+                 codec: str = "flac", on_encoded=None, local_match=None):
+        self.transcribe = transcribe
+        self.local_match = local_match
+        self.timer = timer
+        self.codec = codec
+        self.on_encoded = on_encoded
+        self.executor = executor
+        self.samplerate = samplerate
+        self.frame_ms = frame_ms
+        self.segmenting = pause_s is not None
+        self.pause_frames = max(1, int(round((pause_s or 0) * 1000 / frame_ms)))
+        self.min_segment_frames = max(1, int(round(min_segment_s * 1000 / frame_ms)))
+        self.speculate_frames = int(round(speculate_s * 1000 / frame_ms)) if speculate_s > 0 else 0
+        self.max_segment_frames = int(round(max_segment_s * 1000 / frame_ms)) if max_segment_s else 0
+        self.overlap_frames = int(round(overlap_s * 1000 / frame_ms))
+        self.search_frames = max(1, 1000 // frame_ms)
+
+        self._frames = []
+        self._encoder = None
+        self._has_speech = False
+        self._silence_frames = 0
+        self._futures = []
+        # Por segmento: si empieza solapado con el anterior (corte forzado sin pausa)
+        self._overlaps = []
+        self._pending_overlap = False
+        self._cancels = []
+        # Petición especulativa en curso sobre self._frames: (future, cancel)
+        self._speculative = None
+        self.speculations = 0
+        self.speculations_cancelled = 0
+        self.speculation_used = False
+
+    @property
+    def segments(self) -> int:
+        return len(self._futures)
+
+    def feed(self, chunk, is_speech: bool):
+        # Copiamos: el chunk puede ser una vista del buffer circular
+        chunk = np.array(chunk, dtype=np.int16, copy=True)
+        self._frames.append(chunk)
+        if self._encoder is None:
+            self._encoder = IncrementalEncoder(self.samplerate, self.codec)
+        self._encoder.feed(chunk)
+        if is_speech:
+            self._has_speech = True
+            self._silence_frames = 0
+            if self._speculative is not None:
+                # La voz ha vuelto: lo especulado se queda corto
+                self._cancel_speculative()
+        else:
+            self._silence_frames += 1
+
+        if (self.segmenting and self._has_speech and self._silence_frames >= self.pause_frames
+                and len(self._frames) >= self.min_segment_frames):
+            self._flush()
+        elif self.segmenting and self.max_segment_frames and len(self._frames) >= self.max_segment_frames:
+            self._force_cut()
+        elif (self.speculate_frames and self._has_speech and self._speculative is None
+                and self._silence_frames == self.speculate_frames):
+            pcm = np.concatenate(self._frames)
+            if not self._futures and self.local_match is not None and self.local_match(pcm) is not None:
+                return
+            self.speculations += 1
+            self._speculative = self._submit(pcm)
+
+    def _submit(self, pcm):
+        cancel = CancelToken()
+        self._cancels.append(cancel)
+        return self.executor.submit(self._transcribe_segment, pcm, cancel), cancel
+
+    def _cancel_speculative(self):
+        future, cancel = self._speculative
+        self._speculative = None
+        cancel.set()
+        future.cancel()
+        self.speculations_cancelled += 1
+
+    def _flush(self):
+        frames, self._frames = self._frames, []
+        encoder, self._encoder = self._encoder, None
+        has_speech, self._has_speech = self._has_speech, False
+        self._silence_frames = 0
+        speculative, self._speculative = self._speculative, None
+        if speculative is not None or not frames or not has_speech:
+            if encoder is not None:
+                encoder.abort()
+            if speculative is not None:
+                # Desde que se especuló sólo ha llegado silencio: esa petición ya es el segmento
+                self.speculation_used = True
+                self._append(speculative[0])
+            return
+        self._append(self._submit(encoder)[0])
+
+    def _append(self, future):
+        self._futures.append(future)
+        self._overlaps.append(self._pending_overlap)
+        self._pending_overlap = False
+
+    def _force_cut(self):
+        if self._speculative is not None:
+            self._cancel_speculative()
+        frames = self._frames
+        search = np.stack(frames[-self.search_frames:]).astype(np.float32)
+        cut = len(frames) - len(search) + int(np.argmin(np.einsum('ij,ij->i', search, search))) + 1
+        self._frames = frames[max(0, cut - self.overlap_frames):]
+        self._silence_frames = 0
+        # El codificador incremental ya tiene audio posterior al corte: se rehace en ambos lados
+        self._encoder.abort()
+        self._encoder = IncrementalEncoder(self.samplerate, self.codec)
+        for chunk in self._frames:
+            self._encoder.feed(chunk)
+        self._append(self._submit(np.concatenate(frames[:cut]))[0])
+        self._pending_overlap = self.overlap_frames > 0
+
+    def _transcribe_segment(self, pcm, cancel) -> str:
+        """``pcm`` es un array int16 o un :class:`IncrementalEncoder` con el segmento ya en curso."""
+        if isinstance(pcm, IncrementalEncoder):
+            audio = pcm.finish()
+            samples, encode_s = pcm.samples, pcm.encode_s
+        else:
+            t0 = time.thread_time()
+            audio = encode(pcm, self.samplerate, self.codec)
+            samples, encode_s = len(pcm), time.thread_time() - t0
+        if self.timer is not None:
+            self.timer.add("encode", encode_s)
+            self.timer.count("payload_bytes", len(audio))
+        if self.on_encoded is not None:
+            self.on_encoded(self.codec, len(audio), samples / self.samplerate, encode_s)
+        return self.transcribe(audio, cancel)
+
+    def finish(self, timeout: float | None = None, cancel=None) -> str:
+        """Envía la cola pendiente y devuelve el texto de todos los segmentos en orden.
+
+        Si se activa ``cancel`` deja de esperar en el acto (``TranscriptionCancelled``).
+        """
+        self._flush()
+        wait_futures(self._futures, cancel, timeout)
+        words = []
+        for future, overlap in zip(self._futures, self._overlaps):
+            segment = future.result().split()
+            if overlap:
+                segment = segment[overlap_words(words, segment):]
+            words.extend(segment)
+        return " ".join(words)
+
+    def cancel(self):
+        self._frames = []
+        if self._encoder is not None:
+            self._encoder.abort()
+            self._encoder = None
+        self._speculative = None
+        for event in self._cancels:
+            event.set()
+        for f in self._futures:
+            f.cancel()
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+#
+#    Copyright (C) 2025 by YOUR NAME HERE
+#
+#    This file is part of RoboComp
+#
+#    RoboComp is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    RoboComp is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with RoboComp.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import numpy as np
+
+
+class VADStage:
+    """Detector de voz por lotes.
+
+    ``frames`` es un array int16 de forma ``(n, blocksize)`` (normalmente una
+    vista del buffer circular) y el resultado un array bool de longitud ``n``.
+    """
+
+    name = "base"
+    # Los modelos con estado tienen que ver todo el audio, en orden
+    stateful = False
+
+    def is_speech_batch(self, frames) -> np.ndarray:
+        raise NotImplementedError
+
+
+def frame_features(frames):
+    """RMS y tasa de cruces por cero de cada bloque, vectorizado."""
+    x = frames.astype(np.float32)
+    rms = np.sqrt(np.einsum('ij,ij->i', x, x) / x.shape[1])
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+    return rms, zcr
+
+
+class EnergyGate:
+    """Puerta barata con NumPy: marca como silencio los bloques claramente sin voz.
+
+    Un bloque es silencio si su RMS (en unidades int16) está por debajo de
+    ``rms_threshold``, o si es poco energético (< 2x umbral) y tiene una tasa
+    de cruces por cero mayor que ``zcr_max`` (ruido de fondo tipo siseo).
+    """
+
+    def __init__(self, rms_threshold: float = 150.0, zcr_max: float = 0.35):
+        self.rms_threshold = rms_threshold
+        self.zcr_max = zcr_max
+
+    def candidates(self, frames) -> np.ndarray:
+        rms, zcr = frame_features(frames)
+        silent = (rms < self.rms_threshold) | ((rms < 2 * self.rms_threshold) & (zcr > self.zcr_max))
+        return ~silent
+
+
+class WebRTCVad(VADStage):
+    """webrtcvad sobre cada bloque, sin copiar a ``bytes``."""
+
+    name = "webrtc"
+
+    def __init__(self, aggressiveness: int, samplerate: int):
+        import webrtcvad
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.samplerate = samplerate
+
+    def is_speech_batch(self, frames) -> np.ndarray:
+        out = np.zeros(len(frames), dtype=bool)
+        length = frames.shape[1]
+        for i, row in enumerate(frames):
+            # Las filas son C-contiguas: webrtcvad lee su buffer visto como bytes
+            # (comprueba ``length`` en muestras contra ``len(buf) // 2``)
+            out[i] = self.vad.is_speech(memoryview(row).cast('B'), self.samplerate, length)
+        return out
+
+
+class OnnxVad(VADStage):
+    """Modelo tipo Silero (v5) en ONNX sobre CPU.
+
+    El modelo trabaja con ventanas de ``window`` muestras y un contexto previo,
+    así que el audio se acumula y cada bloque recibe la última probabilidad.
+    """
+
+    name = "silero"
+    stateful = True
+
+    def __init__(self, model_path: str, samplerate: int, threshold: float = 0.5, threads: int = 1):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=opts,
+                                            providers=["CPUExecutionProvider"])
+        self.samplerate = samplerate
+        self.threshold = threshold
+        self.window = 512 if samplerate == 16_000 else 256
+        self.context = 64 if samplerate == 16_000 else 32
+        self._sr = np.array(samplerate, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self._state = np.zeros((2, 1, 128), dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._ctx = np.zeros(self.context, dtype=np.float32)
+        self._prob = 0.0
+
+    def is_speech_batch(self, frames) -> np.ndarray:
+        out = np.zeros(len(frames), dtype=bool)
+        for i, row in enumerate(frames):
+            self._pending = np.concatenate((self._pending, row.astype(np.float32) / 32768.0))
+            while self._pending.size >= self.window:
+                chunk, self._pending = self._pending[:self.window], self._pending[self.window:]
+                x = np.concatenate((self._ctx, chunk))[np.newaxis, :]
+                prob, self._state = self.session.run(None, {"input": x, "state": self._state, "sr": self._sr})
+                self._ctx = chunk[-self.context:]
+                self._prob = float(prob[0][0])
+            out[i] = self._prob >= self.threshold
+        return out
+
+
+class GatedVad(VADStage):
+    """Aplica ``gate`` y sólo consulta ``inner`` en los bloques que la superan.
+
+    Con un ``inner`` con estado (Silero) el modelo recibe siempre el lote completo
+    para no romper su contexto; la puerta sólo anula su decisión en los bloques
+    silenciosos y no ahorra CPU.
+    """
+
+    def __init__(self, inner: VADStage, gate: EnergyGate):
+        self.inner = inner
+        self.gate = gate
+        self.name = f"gate+{inner.name}"
+        self.gated_frames = 0
+        self.total_frames = 0
+
+    def is_speech_batch(self, frames) -> np.ndarray:
+        out = self.gate.candidates(frames)
+        idx = np.flatnonzero(out)
+        self.total_frames += len(frames)
+        self.gated_frames += len(frames) - idx.size
+        if self.inner.stateful:
+            return self.inner.is_speech_batch(frames) & out
+        if idx.size == len(frames):
+            return self.inner.is_speech_batch(frames)
+        if idx.size:
+            out[idx] = self.inner.is_speech_batch(frames[idx])
+        return out
+
+
+def create_vad(kind: str, aggressiveness: int, samplerate: int, params: dict | None = None) -> VADStage:
+    """Construye el VAD de ``ASR.VAD`` (webrtc o silero) con la puerta de energía opcional."""
+    params = params or {}
+    kind = kind.strip().lower()
+    if kind == "webrtc":
+        vad = WebRTCVad(aggressiveness, samplerate)
+    elif kind == "silero":
+        vad = OnnxVad(params["ASR.VADModel"], samplerate,
+                      threshold=float(params.get("ASR.VADThreshold", 0.5)))
+    else:
+        raise ValueError(f"ASR.VAD desconocido: {kind}")
+
+    if str(params.get("ASR.EnergyGate", "true")).strip().lower() in ("1", "true", "yes", "on"):
+        gate = EnergyGate(rms_threshold=float(params.get("ASR.EnergyGateRMS", 150.0)),
+                          zcr_max=float(params.get("ASR.EnergyGateZCR", 0.35)))
+        vad = GatedVad(vad, gate)
+    return vad
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los módulos del componente se importan como en ebo_asr.py, desde src/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
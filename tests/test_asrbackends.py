@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from asrbackends import ASRBackend, BackendUnavailable, HedgedBackend, TranscriptionCancelled
+from asrjobs import CancelToken
+from asrmetrics import MetricsRegistry
+
+
+class SlowBackend(ASRBackend):
+    """Responde ``text`` tras ``latency_s`` o lanza ``error``; anota si lo cancelaron."""
+
+    def __init__(self, name: str, latency_s: float, text: str = "", error: Exception | None = None):
+        self.name = name
+        self.latency_s = latency_s
+        self.text = text
+        self.error = error
+        self.started = threading.Event()
+        self.cancelled = threading.Event()
+
+    def transcribe(self, audio, language=None, stats=None, deadline=None, cancel=None):
+        self.started.set()
+        if cancel is not None and cancel.wait(self.latency_s):
+            self.cancelled.set()
+            raise TranscriptionCancelled(self.name)
+        if self.error is not None:
+            raise self.error
+        return self.text
+
+
+def hedged(primary, hedge, **kwargs):
+    kwargs.setdefault("delay_s", 0.1)
+    kwargs.setdefault("min_delay_s", 0.05)
+    return HedgedBackend(primary, hedge, metrics=MetricsRegistry(), **kwargs)
+
+
+def test_fast_primary_does_not_hedge():
+    primary, hedge = SlowBackend("a", 0.01, "hola"), SlowBackend("b", 0.01, "adiós")
+    backend = hedged(primary, hedge)
+    stats = {}
+    assert backend.transcribe(b"", stats=stats) == "hola"
+    assert stats["winner"] == "a" and not stats["hedged"]
+    assert not hedge.started.is_set()
+    assert backend.metrics.counters().get("hedge_sent", 0) == 0
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary, hedge = SlowBackend("a", 2.0, "tarde"), SlowBackend("b", 0.01, "a tiempo")
+    backend = hedged(primary, hedge)
+    stats = {}
+    t0 = time.monotonic()
+    assert backend.transcribe(b"", stats=stats) == "a tiempo"
+    # El hedge sale al cumplirse el retardo, no al terminar el primario
+    assert time.monotonic() - t0 < 1.0
+    assert stats["winner"] == "b" and stats["hedged"]
+    # La rama que pierde recibe su cancelación
+    assert primary.cancelled.wait(1.0)
+    counters = backend.metrics.counters()
+    assert counters["hedge_sent"] == 1 and counters["hedge_won"] == 1
+
+
+def test_failing_primary_hedges_at_once():
+    primary = SlowBackend("a", 0.0, error=BackendUnavailable("a: caído"))
+    hedge = SlowBackend("b", 0.01, "respuesta")
+    backend = hedged(primary, hedge, delay_s=2.0, min_delay_s=2.0)
+    t0 = time.monotonic()
+    assert backend.transcribe(b"") == "respuesta"
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_hedge_delay_follows_primary_latency():
+    backend = hedged(SlowBackend("a", 0.0), SlowBackend("b", 0.0), delay_s=1.5, min_delay_s=0.3,
+                     max_delay_s=3.0, min_samples=5, percentile=90)
+    # Sin muestras suficientes se usa el retardo fijo
+    assert backend.hedge_delay() == 1.5
+    for latency in (0.4, 0.5, 0.5, 0.6, 0.8):
+        backend._latency.observe(latency)
+    assert 0.6 <= backend.hedge_delay() <= 0.8
+    for _ in range(20):
+        backend._latency.observe(10.0)
+    assert backend.hedge_delay() == 3.0
+
+
+def test_turn_cancel_stops_both_branches():
+    primary, hedge = SlowBackend("a", 2.0), SlowBackend("b", 2.0)
+    backend = hedged(primary, hedge)
+    cancel = CancelToken()
+    threading.Timer(0.2, cancel.set).start()
+    t0 = time.monotonic()
+    with pytest.raises(TranscriptionCancelled):
+        backend.transcribe(b"", cancel=cancel)
+    assert time.monotonic() - t0 < 1.0
+    assert primary.cancelled.wait(1.0) and hedge.cancelled.wait(1.0)
+
+
+def test_deadline_without_answer_is_unavailable():
+    backend = hedged(SlowBackend("a", 2.0), SlowBackend("b", 2.0))
+    with pytest.raises(BackendUnavailable):
+        backend.transcribe(b"", deadline=time.monotonic() + 0.3)
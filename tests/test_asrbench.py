@@ -0,0 +1,39 @@
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# asrbench monta el worker completo: necesita Qt, Ice y webrtcvad
+pytestmark = pytest.mark.skipif(
+    any(importlib.util.find_spec(m) is None for m in ("PySide6", "Ice", "webrtcvad", "soundfile")),
+    reason="asrbench necesita PySide6, Ice, webrtcvad y soundfile")
+
+
+def bench(tmp_path, pcm, *args) -> dict:
+    import soundfile as sf
+
+    wav = tmp_path / "turn.wav"
+    sf.write(wav, pcm, 16_000, subtype="PCM_16")
+    out = tmp_path / "bench.json"
+    # En un proceso aparte: si la reproducción se queda colgada, el timeout lo detecta
+    subprocess.run([sys.executable, "src/asrbench.py", str(wav), "--speed", "8", "--backend-latency", "0.05",
+                    "--json", str(out), *args], cwd=ROOT, check=True, timeout=60)
+    return json.loads(out.read_text())
+
+
+def test_file_without_speech_ends_at_end_of_file(tmp_path):
+    result = bench(tmp_path, np.zeros(2 * 16_000, dtype=np.int16))
+    assert result["files"][0]["outcome"] == "no_speech"
+
+
+def test_speech_cut_by_end_of_file_is_transcribed(tmp_path):
+    t = np.arange(3 * 16_000) / 16_000
+    voiced = (np.sin(2 * np.pi * 200 * t) + 0.5 * np.sin(2 * np.pi * 450 * t)) * 8000
+    result = bench(tmp_path, voiced.astype(np.int16), "--tail-silence", "0")
+    assert result["files"][0]["outcome"] == "ok"
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from asrjobs import CancelToken, JobManager, ListenJob
+
+
+def test_jobs_run_in_order():
+    jobs = JobManager()
+    try:
+        order = []
+        submitted = [jobs.submit(lambda i=i: order.append(i) or str(i)) for i in range(3)]
+        for job in submitted:
+            assert job.wait(2.0)
+        assert order == [0, 1, 2]
+        assert [job.text for job in submitted] == ["0", "1", "2"]
+        assert all(job.state == ListenJob.DONE for job in submitted)
+    finally:
+        jobs.shutdown()
+
+
+def test_cancel_all_skips_pending_jobs():
+    jobs = JobManager()
+    release = threading.Event()
+    ran = []
+    try:
+        running = jobs.submit(lambda: release.wait(2.0) and "")
+        pending = jobs.submit(lambda: ran.append(True) or "")
+        time.sleep(0.05)
+        assert jobs.cancel_all() == 2
+        release.set()
+        assert running.wait(2.0) and pending.wait(2.0)
+        assert running.state == pending.state == ListenJob.CANCELLED
+        assert not ran
+    finally:
+        jobs.shutdown()
+
+
+def test_failed_job_keeps_the_error():
+    jobs = JobManager()
+    try:
+        def boom():
+            raise RuntimeError("micrófono")
+
+        job = jobs.submit(boom)
+        assert job.wait(2.0)
+        assert job.state == ListenJob.FAILED and isinstance(job.error, RuntimeError)
+    finally:
+        jobs.shutdown()
+
+
+def test_cancel_all_gives_up_on_stuck_jobs_after_timeout():
+    finished = []
+    jobs = JobManager(on_finished=finished.append)
+    release = threading.Event()
+    try:
+        job = jobs.submit(lambda: release.wait(5.0) and "tarde")
+        time.sleep(0.05)
+        t0 = time.monotonic()
+        jobs.cancel_all(timeout=0.1)
+        assert time.monotonic() - t0 < 1.0
+        assert job.finished and job.state == ListenJob.CANCELLED
+        release.set()
+        time.sleep(0.05)
+        # El hilo acaba después, pero el resultado se descarta y sólo se notifica una vez
+        assert job.state == ListenJob.CANCELLED and job.text == ""
+        assert finished == [job]
+    finally:
+        jobs.shutdown()
+
+
+def test_cancel_token_callbacks():
+    token = CancelToken()
+    called = []
+    token.add_callback(lambda: called.append("antes"))
+    token.set()
+    token.set()
+    token.add_callback(lambda: called.append("después"))
+    assert called == ["antes", "después"]
+    assert token.is_set() and token.stamp is not None
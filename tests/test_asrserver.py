@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+import pytest
+
+from asrserver import BatchingTranscriber
+
+
+class BatchBackend:
+    """Backend falso con ``transcribe_batch``: devuelve la longitud de cada PCM y apunta los lotes."""
+
+    name = "fake"
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def transcribe_batch(self, pcms, languages) -> list:
+        self.release.wait()
+        time.sleep(self.latency_s)
+        self.batches.append(len(pcms))
+        return [f"{len(p)}:{lang}" for p, lang in zip(pcms, languages)]
+
+
+def pcm(n: int) -> np.ndarray:
+    return np.zeros(n, dtype=np.int16)
+
+
+def test_results_match_requests():
+    server = BatchingTranscriber(BatchBackend(), max_batch=4, workers=1)
+    try:
+        futures = [server.submit(pcm(100 + i), "es") for i in range(6)]
+        assert [f.result(2.0) for f in futures] == [f"{100 + i}:es" for i in range(6)]
+    finally:
+        server.close()
+
+
+def test_requests_accumulate_while_workers_are_busy():
+    backend = BatchBackend()
+    backend.release.clear()
+    server = BatchingTranscriber(backend, max_batch=8, window_s=0.0, workers=1)
+    try:
+        first = server.submit(pcm(10))
+        time.sleep(0.05)
+        rest = [server.submit(pcm(10)) for _ in range(5)]
+        backend.release.set()
+        for f in [first, *rest]:
+            f.result(2.0)
+        assert backend.batches == [1, 5]
+        assert server.stats()["batches"] == 2
+    finally:
+        server.close()
+
+
+def test_timed_out_request_leaves_the_queue():
+    backend = BatchBackend()
+    backend.release.clear()
+    server = BatchingTranscriber(backend, max_batch=8, window_s=0.0, workers=1)
+    try:
+        busy = server.submit(pcm(10))
+        time.sleep(0.05)
+        with pytest.raises(FutureTimeout):
+            server.transcribe(pcm(20), deadline=time.monotonic() + 0.05)
+        later = server.submit(pcm(30))
+        backend.release.set()
+        assert busy.result(2.0) == "10:None"
+        assert later.result(2.0) == "30:None"
+        # La petición caducada no llegó a ningún lote
+        assert backend.batches == [1, 1]
+    finally:
+        server.close()
+
+
+def test_backend_errors_reach_every_request():
+    class Failing(BatchBackend):
+        def transcribe_batch(self, pcms, languages):
+            raise RuntimeError("modelo caído")
+
+    server = BatchingTranscriber(Failing(), max_batch=4, workers=1)
+    try:
+        futures = [server.submit(pcm(10)) for _ in range(3)]
+        for f in futures:
+            with pytest.raises(RuntimeError):
+                f.result(2.0)
+    finally:
+        server.close()
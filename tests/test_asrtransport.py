@@ -0,0 +1,57 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from asrtransport import TokenBucket, backoff_delay, retry_after_s
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20.0, burst=2)
+    assert bucket.acquire() < 0.01
+    assert bucket.acquire() < 0.01
+    # Sin fichas: la siguiente llega tras 1 / rate
+    waited = bucket.acquire()
+    assert 0.03 <= waited <= 0.2
+
+
+def test_bucket_without_rate_never_waits():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire() < 0.01 for _ in range(50))
+
+
+def test_bucket_refuses_slot_after_deadline():
+    bucket = TokenBucket(rate=1.0, burst=1)
+    bucket.acquire()
+    with pytest.raises(TimeoutError):
+        bucket.acquire(deadline=time.monotonic() + 0.1)
+
+
+def test_pause_blocks_until_retry_after():
+    bucket = TokenBucket(rate=0)
+    bucket.pause(0.15)
+    waited = bucket.acquire()
+    assert 0.1 <= waited <= 0.5
+    bucket.pause(1.0)
+    with pytest.raises(TimeoutError):
+        bucket.acquire(deadline=time.monotonic() + 0.1)
+
+
+def test_backoff_is_capped_full_jitter():
+    for attempt in range(1, 8):
+        cap = min(1.0, 0.1 * 2 ** (attempt - 1))
+        delays = [backoff_delay(attempt, 0.1, 1.0) for _ in range(200)]
+        assert all(0.0 <= d <= cap for d in delays)
+    # Jitter completo: las esperas se reparten por todo el intervalo
+    assert max(backoff_delay(5, 0.1, 1.0) for _ in range(200)) > 0.5
+
+
+def test_retry_after_headers():
+    assert retry_after_s(SimpleNamespace(headers={"retry-after-ms": "250"})) == 0.25
+    assert retry_after_s(SimpleNamespace(headers={"retry-after": "2"})) == 2.0
+    # La versión en milisegundos tiene prioridad
+    assert retry_after_s(SimpleNamespace(headers={"retry-after-ms": "100", "retry-after": "5"})) == 0.1
+    # Fecha HTTP o sin cabecera: se deja al backoff
+    assert retry_after_s(SimpleNamespace(headers={"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})) is None
+    assert retry_after_s(SimpleNamespace(headers={})) is None
+    assert retry_after_s(object()) is None
@@ -0,0 +1,67 @@
+import functools
+import threading
+
+import numpy as np
+
+from asrjobs import CancelToken
+from audiocapture import AudioCapture, ReplayInputStream
+
+
+def replay_capture(pcm, speed: float = 8.0, **kwargs) -> AudioCapture:
+    factory = functools.partial(ReplayInputStream, pcm, speed=speed, lead_silence_s=0.0, **kwargs)
+    return AudioCapture(samplerate=16_000, channels=1, frame_ms=30, capacity_s=2.0, stream_factory=factory)
+
+
+def drain(reader, result: list):
+    # Lee como record_wav_until_silence: sin timeout, hasta que next_batch devuelva None
+    while (batch := reader.next_batch(4)) is not None:
+        result.append(len(batch))
+    result.append(None)
+
+
+def test_reader_wakes_when_replay_ends():
+    pcm = np.zeros(16_000 // 2, dtype=np.int16)
+    capture = replay_capture(pcm, tail_silence_s=0.0)
+    capture.start()
+    reader = capture.reader()
+    result = []
+    t = threading.Thread(target=drain, args=(reader, result), daemon=True)
+    t.start()
+    t.join(5.0)
+    assert not t.is_alive(), "el lector sigue esperando tras el fin del fichero"
+    assert result[-1] is None
+    assert sum(result[:-1]) == capture.write_index == -(-len(pcm) // capture.blocksize)
+    capture.release(reader)
+    capture.stop()
+
+
+def test_reader_wakes_on_stop_and_cancel():
+    pcm = np.zeros(16_000 * 30, dtype=np.int16)
+    for stop in ("capture", "cancel"):
+        capture = replay_capture(pcm, speed=1.0)
+        capture.start()
+        cancel = CancelToken()
+        reader = capture.reader(cancel=cancel)
+        result = []
+        t = threading.Thread(target=drain, args=(reader, result), daemon=True)
+        t.start()
+        if stop == "capture":
+            capture.stop()
+        else:
+            cancel.set()
+        t.join(2.0)
+        assert not t.is_alive(), stop
+        capture.release(reader)
+        capture.stop()
+
+
+def test_replay_delivers_blocks_in_order():
+    pcm = (np.arange(480 * 5) % 1000).astype(np.int16)
+    capture = replay_capture(pcm, speed=50.0, tail_silence_s=0.0)
+    capture.start()
+    reader = capture.reader()
+    got = []
+    while (batch := reader.next_batch(8)) is not None:
+        got.append(batch.copy())
+    capture.stop()
+    assert np.array_equal(np.concatenate(got).reshape(-1), pcm)
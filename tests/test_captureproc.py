@@ -0,0 +1,87 @@
+import functools
+import importlib.util
+
+import numpy as np
+import pytest
+
+from audiocapture import ReplayInputStream
+from captureproc import ProcessAudioCapture
+
+BLOCK = 480  # 30 ms a 16 kHz
+
+needs_webrtcvad = pytest.mark.skipif(importlib.util.find_spec("webrtcvad") is None,
+                                     reason="webrtcvad no instalado")
+
+
+def process_capture(pcm, speed: float = 20.0, vad_kind=None) -> ProcessAudioCapture:
+    # partial de una clase del paquete: se puede serializar para el proceso hijo
+    factory = functools.partial(ReplayInputStream, pcm, speed=speed, lead_silence_s=0.0, tail_silence_s=0.0)
+    return ProcessAudioCapture(samplerate=16_000, channels=1, frame_ms=30, capacity_s=2.0,
+                               stream_factory=factory, vad_kind=vad_kind)
+
+
+def read_all(capture, aggressiveness: int | None = None):
+    reader = capture.reader()
+    blocks, flags = [], []
+    while (batch := reader.next_batch(8, timeout=5.0)) is not None:
+        first = reader.index - len(batch)
+        blocks.append(batch.copy())
+        if aggressiveness is not None:
+            flags.append(capture.speech_flags(first, len(batch), aggressiveness))
+    capture.release(reader)
+    return np.concatenate(blocks), flags
+
+
+def test_blocks_cross_the_shared_ring_in_order():
+    pcm = (np.arange(BLOCK * 20) % 2000 - 1000).astype(np.int16)
+    capture = process_capture(pcm)
+    try:
+        capture.start()
+        blocks, flags = read_all(capture, aggressiveness=3)
+        assert np.array_equal(blocks.reshape(-1), pcm)
+        # Sin VAD en el hijo no hay decisiones: el padre usa el suyo
+        assert all(f is None for f in flags)
+        assert capture.stats()["frames_dropped"] == 0
+    finally:
+        capture.close()
+
+
+def test_child_start_failure_is_raised_in_parent():
+    capture = process_capture(np.zeros(BLOCK, np.int16), speed=0.0)
+    try:
+        with pytest.raises(RuntimeError, match="speed"):
+            capture.start()
+        assert not capture.running
+    finally:
+        capture.close()
+
+
+def test_unknown_vad_leaves_flags_undecided():
+    capture = process_capture(np.zeros(BLOCK * 10, np.int16), vad_kind="nope")
+    try:
+        capture.start()
+        capture.request_vad(3)
+        _blocks, flags = read_all(capture, aggressiveness=3)
+        assert all(f is None for f in flags)
+    finally:
+        capture.close()
+
+
+@needs_webrtcvad
+def test_child_vad_marks_speech():
+    t = np.arange(16_000) / 16_000
+    tone = (np.sin(2 * np.pi * 200 * t) * np.sin(2 * np.pi * 3 * t) * 12000).astype(np.int16)
+    pcm = np.concatenate([np.zeros(16_000, np.int16), tone])
+    capture = process_capture(pcm, speed=4.0, vad_kind="webrtc")
+    capture.request_vad(0)
+    try:
+        capture.start()
+        _blocks, flags = read_all(capture, aggressiveness=0)
+        decided = np.concatenate([f for f in flags if f is not None])
+        assert decided.size > 0
+        half = decided.size // 2
+        # Silencio en la primera mitad, señal sonora en la segunda
+        assert not decided[:half].any()
+        assert decided[half:].any()
+    finally:
+        capture.close()
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from commandmatch import INDEX_FILE, CommandRecognizer, dtw_batch, mfcc
+
+SR = 16_000
+
+
+def sweep(f0: float, f1: float, seconds: float, seed: int = 0) -> np.ndarray:
+    """Barrido de frecuencia con algo de ruido: una "palabra" sintética reconocible."""
+    t = np.arange(int(seconds * SR)) / SR
+    phase = 2 * np.pi * (f0 * t + (f1 - f0) * t ** 2 / (2 * seconds))
+    noise = np.random.default_rng(seed).normal(0, 0.02, t.size)
+    return ((np.sin(phase) * 0.5 + noise) * 32767).astype(np.int16)
+
+
+def padded(pcm, pre_s: float = 0.3, post_s: float = 0.5) -> np.ndarray:
+    # Pre-roll y silencio final como los que trae la captura
+    return np.concatenate([np.zeros(int(pre_s * SR), np.int16), pcm, np.zeros(int(post_s * SR), np.int16)])
+
+
+@pytest.fixture
+def templates(tmp_path):
+    for phrase, (f0, f1) in {"sube": (300, 1500), "baja": (1500, 300)}.items():
+        (tmp_path / phrase).mkdir()
+        for i, seconds in enumerate((0.55, 0.6, 0.65)):
+            sf.write(tmp_path / phrase / f"{i}.wav", sweep(f0, f1, seconds, seed=i), SR)
+    return tmp_path
+
+
+def test_dtw_prefers_the_same_shape():
+    a = mfcc(sweep(300, 1500, 0.6), SR)
+    b = mfcc(sweep(1500, 300, 0.6), SR)
+    templates = np.zeros((2, max(len(a), len(b)), a.shape[1]), np.float32)
+    templates[0, :len(a)], templates[1, :len(b)] = a, b
+    # La misma forma a otra velocidad sigue cerca; la contraria, lejos
+    query = mfcc(sweep(300, 1500, 0.75, seed=5), SR)
+    dist = dtw_batch(query, templates, np.array([len(a), len(b)]))
+    assert dist[0] < dist[1] / 2
+    assert np.isinf(dtw_batch(query[:0], templates, np.array([len(a), len(b)]))).all()
+
+
+def test_matches_known_command_within_threshold(templates):
+    recognizer = CommandRecognizer(str(templates), max_distance=2.0, max_duration_s=1.5)
+    phrase, distance = recognizer.match(padded(sweep(300, 1500, 0.7, seed=9)))
+    assert phrase == "sube" and distance <= 2.0
+    assert recognizer.match(padded(sweep(1500, 300, 0.5, seed=9)))[0] == "baja"
+    # Las MFCC de las plantillas quedan en caché para el próximo arranque
+    assert (templates / INDEX_FILE).exists()
+
+
+def test_rejects_unknown_and_long_utterances(templates):
+    recognizer = CommandRecognizer(str(templates), max_distance=2.0, max_duration_s=1.5)
+    # Un tono fijo no se parece a ningún barrido
+    t = np.arange(int(0.6 * SR)) / SR
+    tone = (np.sin(2 * np.pi * 700 * t) * 16000).astype(np.int16)
+    assert recognizer.match(padded(tone)) is None
+    # Más voz que max_duration_s: no es una orden corta
+    assert recognizer.match(padded(sweep(300, 1500, 2.5))) is None
+    # Con un umbral imposible nada pasa
+    strict = CommandRecognizer(str(templates), max_distance=1e-3)
+    assert strict.match(padded(sweep(300, 1500, 0.6, seed=1))) is None
+
+
+def test_open_end_matches_command_prefix(templates):
+    recognizer = CommandRecognizer(str(templates), max_distance=2.0, max_duration_s=1.0)
+    # La orden seguida de más voz: sólo cuenta el principio
+    pcm = padded(np.concatenate([sweep(1500, 300, 0.6, seed=3), sweep(500, 900, 2.0, seed=4)]))
+    assert recognizer.match(pcm) is None
+    assert recognizer.match(pcm, open_end=True)[0] == "baja"
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from endpointing import AdaptiveEndpointing
+
+BLOCK = 480  # 30 ms a 16 kHz
+
+
+def noise(db: float, frames: int = 100, seed: int = 0) -> np.ndarray:
+    """Bloques de ruido blanco con RMS de ``db`` dBFS."""
+    x = np.random.default_rng(seed).normal(0, 32768 * 10 ** (db / 20), (frames, BLOCK))
+    return x.astype(np.int16)
+
+
+def test_defaults_before_any_measurement():
+    ep = AdaptiveEndpointing(frame_ms=30)
+    assert ep.vad_aggressiveness == 1
+    assert ep.activation_ms == 120
+    assert ep.end_silence_s == pytest.approx(0.7)
+
+
+def test_noise_floor_scales_vad_and_activation():
+    ep = AdaptiveEndpointing(frame_ms=30)
+    ep.observe_noise(noise(-70))
+    assert ep.noise_floor_db < -60
+    assert (ep.vad_aggressiveness, ep.activation_ms) == (1, 120)
+
+    ep = AdaptiveEndpointing(frame_ms=30)
+    ep.observe_noise(noise(-50))
+    assert ep.noise_floor_db == pytest.approx(-50, abs=1.5)
+    assert ep.vad_aggressiveness == 2
+    # A medio camino entre 120 y 300 ms, redondeado a bloques de 30 ms
+    assert ep.activation_ms == 210
+
+    ep.observe_noise(noise(-30, frames=1000, seed=1))
+    assert (ep.vad_aggressiveness, ep.activation_ms) == (3, 300)
+
+
+def test_end_silence_follows_pause_percentile():
+    ep = AdaptiveEndpointing(frame_ms=30, min_pauses=10, pause_percentile=95, pause_margin_s=0.15)
+    for _ in range(9):
+        ep.observe_pause(0.2)
+    # Con menos de min_pauses pausas se mantiene el valor fijo
+    assert ep.end_silence_s == pytest.approx(0.7)
+    ep.observe_pause(0.2)
+    assert ep.end_silence_s == pytest.approx(0.35)
+    for _ in range(10):
+        ep.observe_pause(0.6)
+    assert ep.end_silence_s == pytest.approx(0.75)
+    # Acotado a end_silence_s
+    for _ in range(50):
+        ep.observe_pause(3.0)
+    assert ep.end_silence_s == pytest.approx(1.0)
+
+
+def test_speech_right_after_endpoint_counts_as_early_cut():
+    ep = AdaptiveEndpointing(frame_ms=30, min_pauses=1)
+    saving = ep.turn_ended(last_voice_stamp=10.0, end_silence_s=0.4)
+    assert saving == pytest.approx(0.3)
+    assert ep.saved_s == pytest.approx(0.3) and ep.turns == 1
+    # La voz vuelve 0.9 s después del último bloque con voz: el corte fue prematuro
+    ep.speech_started(10.9)
+    assert ep.early_endpoints == 1
+    assert ep.end_silence_s == pytest.approx(1.0)
+    # Un turno nuevo mucho después no cuenta
+    ep.turn_ended(last_voice_stamp=20.0, end_silence_s=0.4)
+    ep.speech_started(30.0)
+    assert ep.early_endpoints == 1
@@ -0,0 +1,97 @@
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from ledfeedback import LED_STATES, LedFeedback
+
+
+class FakeLEDArray:
+    """Proxy falso: anota cada color enviado y deja la llamada en vuelo hasta ``release``."""
+
+    def __init__(self, fail: bool = False):
+        self.sent = []
+        self.fail = fail
+        self.release = threading.Event()
+        self.in_flight = threading.Event()
+        self._cond = threading.Condition()
+
+    def setLEDArrayAsync(self, pixels):
+        with self._cond:
+            self.sent.append(pixels[0])
+            self._cond.notify_all()
+        future = Future()
+        if self.fail:
+            future.set_exception(ConnectionError("sin LEDs"))
+            return future
+        self.in_flight.set()
+
+        def finish():
+            self.release.wait(5.0)
+            future.set_result(None)
+
+        threading.Thread(target=finish, daemon=True).start()
+        return future
+
+    def wait_sent(self, n: int, timeout: float = 2.0) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.sent) >= n, timeout)
+
+
+def color(state: str):
+    r, g, b, w = LED_STATES[state]
+    return SimpleNamespace(red=r, green=g, blue=b, white=w)
+
+
+@pytest.fixture
+def leds():
+    proxy = FakeLEDArray()
+    feedback = LedFeedback(proxy, SimpleNamespace, num_leds=3, timeout_s=5.0)
+    yield proxy, feedback
+    proxy.release.set()
+    feedback.stop()
+
+
+def test_set_state_does_not_block_on_slow_proxy(leds):
+    proxy, feedback = leds
+    feedback.set_state("waiting")
+    assert proxy.in_flight.wait(2.0)
+    t0 = time.monotonic()
+    feedback.set_state("speech")
+    assert time.monotonic() - t0 < 0.05
+
+
+def test_changes_during_a_call_are_coalesced(leds):
+    proxy, feedback = leds
+    feedback.set_state("waiting")
+    assert proxy.in_flight.wait(2.0)
+    # Mientras la primera llamada sigue en vuelo sólo cuenta el último estado
+    for state in ("speech", "transcribing", "speech", "off"):
+        feedback.set_state(state)
+    assert feedback.state == "off"
+    proxy.release.set()
+    assert proxy.wait_sent(2)
+    time.sleep(0.05)
+    assert proxy.sent == [color("waiting"), color("off")]
+
+
+def test_unknown_state_is_rejected(leds):
+    _proxy, feedback = leds
+    with pytest.raises(ValueError):
+        feedback.set_state("rainbow")
+
+
+def test_failures_are_logged_once(capsys):
+    proxy = FakeLEDArray(fail=True)
+    feedback = LedFeedback(proxy, SimpleNamespace, num_leds=1)
+    try:
+        feedback.set_state("waiting")
+        assert proxy.wait_sent(1)
+        feedback.set_state("speech")
+        assert proxy.wait_sent(2)
+        time.sleep(0.05)
+    finally:
+        feedback.stop()
+    assert capsys.readouterr().err.count("[LED]") == 1
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from asrmetrics import MetricsRegistry
+from listenstate import ARMED, CANCELLED, CAPTURING, DONE, IDLE, TRANSCRIBING, ListenStateMachine
+
+
+def test_full_turn():
+    machine = ListenStateMachine()
+    for event, state in (("listen", ARMED), ("speech", CAPTURING), ("endpoint", TRANSCRIBING),
+                         ("text", DONE), ("reset", IDLE)):
+        assert machine.fire(event)
+        assert machine.state == state
+    assert not machine.active
+
+
+def test_invalid_events_are_ignored():
+    machine = ListenStateMachine()
+    assert not machine.fire("speech")
+    assert machine.fire("listen") and machine.fire("stop")
+    # Lo que llegue tarde de la captura o del backend tras un stop no cambia nada
+    assert not machine.fire("speech")
+    assert not machine.fire("text")
+    assert machine.state == CANCELLED
+
+
+def test_on_enter_runs_listeners_in_order():
+    machine = ListenStateMachine()
+    seen = []
+    machine.on_enter(CAPTURING, lambda: seen.append("a"))
+    machine.on_enter(CAPTURING, lambda: seen.append("b"))
+    machine.fire("listen")
+    assert seen == []
+    machine.fire("speech")
+    assert seen == ["a", "b"]
+
+
+def test_wait_for_wakes_on_transition():
+    machine = ListenStateMachine()
+    machine.fire("listen")
+    assert not machine.wait_for((DONE, CANCELLED), timeout=0.05)
+    threading.Timer(0.05, machine.fire, ("stop",)).start()
+    t0 = time.monotonic()
+    assert machine.wait_for((DONE, CANCELLED), timeout=2.0)
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_snapshot_accumulates_time_per_state():
+    metrics = MetricsRegistry()
+    machine = ListenStateMachine(metrics=metrics)
+    machine.fire("listen")
+    time.sleep(0.05)
+    machine.fire("no_speech")
+    state, current, times = machine.snapshot()
+    assert state == DONE and current < 0.05
+    entries, seconds = times[ARMED]
+    assert entries == 1 and seconds >= 0.05
+    assert times[IDLE][0] == 1
+    # Cada estancia fuera de idle va al histograma state_<estado>
+    assert "state_armed" in {row[0] for row in metrics.snapshot()}
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from resample import PolyphaseResampler, resample
+
+
+def tone(rate: int, seconds: float, freq: float = 1000.0) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * freq * t) * 10_000).astype(np.int16)
+
+
+@pytest.mark.parametrize("rate", [48_000, 44_100, 32_000])
+def test_block_sizes(rate):
+    block = rate * 30 // 1000
+    rs = PolyphaseResampler(rate, 16_000, block)
+    assert rs.out_block == 480
+    out = rs.process(np.zeros((block, 1), dtype=np.int16))
+    assert out.shape == (480, 1) and out.dtype == np.int16
+
+
+def test_rejects_fractional_blocks():
+    with pytest.raises(ValueError):
+        PolyphaseResampler(44_100, 16_000, 1000)
+
+
+@pytest.mark.parametrize("rate", [48_000, 44_100])
+def test_tone_quality(rate):
+    x = tone(rate, 1.0)
+    y = resample(x, rate, 16_000).astype(np.float64)
+    assert len(y) == len(x) * 16_000 // rate
+    delay = PolyphaseResampler(rate, 16_000, rate * 30 // 1000).delay
+    ref = np.sin(2 * np.pi * 1000 * (np.arange(y.size) - delay) / 16_000) * 10_000
+    err = (y - ref)[y.size // 4:]
+    snr = 10 * np.log10(np.mean(ref[y.size // 4:] ** 2) / np.mean(err ** 2))
+    assert snr > 60
+
+
+def test_rejects_above_nyquist():
+    # 12 kHz no cabe en 16 kHz: el filtro lo tiene que quitar
+    y = resample(tone(48_000, 0.5, freq=12_000), 48_000, 16_000).astype(np.float64)
+    assert np.sqrt(np.mean(y[len(y) // 4:] ** 2)) < 100
+
+
+def test_same_rate_is_identity():
+    x = tone(16_000, 0.1)
+    assert resample(x, 16_000, 16_000) is x
+
+
+def test_blocks_match_whole_signal():
+    rate, block = 48_000, 1440
+    x = tone(rate, 0.3)[:block * 10]
+    rs = PolyphaseResampler(rate, 16_000, block)
+    blocks = np.concatenate([rs.process(b[:, None])[:, 0].copy() for b in x.reshape(10, block)])
+    assert np.array_equal(blocks, resample(x, rate, 16_000))
@@ -0,0 +1,123 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from asrbackends import TranscriptionCancelled
+from asrjobs import CancelToken
+from streaming import SegmentStreamer, overlap_words
+
+BLOCK = 480  # 30 ms a 16 kHz
+
+
+def speech(frames: int) -> list:
+    t = np.arange(frames * BLOCK) / 16_000
+    x = (np.sin(2 * np.pi * 220 * t) * 6000).astype(np.int16)
+    return list(x.reshape(frames, BLOCK))
+
+
+def silence(frames: int) -> list:
+    return list(np.zeros((frames, BLOCK), dtype=np.int16))
+
+
+class ScriptedBackend:
+    """Devuelve los textos de ``texts`` en el orden en que llegan los segmentos."""
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, audio, cancel):
+        with self._lock:
+            text = self.texts[self.calls]
+            self.calls += 1
+        return text
+
+
+def run(streamer, frames):
+    for chunk, is_speech in frames:
+        streamer.feed(chunk, is_speech)
+    return streamer.finish(timeout=5.0)
+
+
+@pytest.fixture
+def executor():
+    # Un solo hilo: los segmentos se transcriben en el orden en que se envían
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        yield ex
+
+
+def test_pause_split_keeps_repeated_words(executor):
+    # Sin corte forzado no hay solape: una palabra repetida es del hablante
+    backend = ScriptedBackend(["sí", "sí claro"])
+    streamer = SegmentStreamer(backend, executor, samplerate=16_000, frame_ms=30, pause_s=0.3,
+                               min_segment_s=0.3, overlap_s=0.3)
+    frames = [(c, True) for c in speech(15)] + [(c, False) for c in silence(12)] + \
+             [(c, True) for c in speech(15)]
+    assert run(streamer, frames) == "sí sí claro"
+    assert streamer.segments == 2
+
+
+def test_overlap_words():
+    assert overlap_words("uno dos tres".split(), "Tres, cuatro".split()) == 1
+    assert overlap_words("uno dos tres".split(), "dos tres cuatro".split()) == 2
+    assert overlap_words("uno dos".split(), "cinco seis".split()) == 0
+    assert overlap_words([], "uno".split()) == 0
+
+
+def test_forced_cut_drops_words_repeated_in_the_overlap(executor):
+    backend = ScriptedBackend(["uno dos tres cuatro", "Cuatro, cinco seis"])
+    streamer = SegmentStreamer(backend, executor, samplerate=16_000, frame_ms=30, pause_s=0.3,
+                               max_segment_s=0.9, overlap_s=0.3)
+    frames = speech(40)
+    frames[25] = frames[25] // 8  # el corte busca el bloque de menos energía
+    text = run(streamer, [(c, True) for c in frames])
+    assert streamer.segments == 2
+    assert text == "uno dos tres cuatro cinco seis"
+
+
+def test_finish_stops_waiting_on_cancel(executor):
+    release = threading.Event()
+
+    def slow(audio, cancel):
+        release.wait(5.0)
+        return "tarde"
+
+    streamer = SegmentStreamer(slow, executor, samplerate=16_000, frame_ms=30, pause_s=0.3)
+    for c in speech(20):
+        streamer.feed(c, True)
+    cancel = CancelToken()
+    threading.Timer(0.05, cancel.set).start()
+    with pytest.raises(TranscriptionCancelled):
+        streamer.finish(timeout=5.0, cancel=cancel)
+    release.set()
+
+
+def test_no_speculation_when_local_command_matches(executor):
+    backend = ScriptedBackend(["enciende la luz"])
+    seen = []
+
+    def local_match(pcm):
+        seen.append(len(pcm))
+        return ("para", 0.5)
+
+    streamer = SegmentStreamer(backend, executor, samplerate=16_000, frame_ms=30, pause_s=None,
+                               speculate_s=0.2, local_match=local_match)
+    for c in speech(20):
+        streamer.feed(c, True)
+    for c in silence(10):
+        streamer.feed(c, False)
+    # La orden se resuelve en local al terminar: nada ha salido hacia el backend
+    assert seen == [(20 + 7) * BLOCK]
+    assert streamer.speculations == 0 and backend.calls == 0
+
+
+def test_speculates_when_no_local_command_matches(executor):
+    backend = ScriptedBackend(["qué hora es"])
+    streamer = SegmentStreamer(backend, executor, samplerate=16_000, frame_ms=30, pause_s=None,
+                               speculate_s=0.2, local_match=lambda pcm: None)
+    frames = [(c, True) for c in speech(20)] + [(c, False) for c in silence(10)]
+    assert run(streamer, frames) == "qué hora es"
+    assert streamer.speculations == 1 and streamer.speculation_used